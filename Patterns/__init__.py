@@ -0,0 +1,11 @@
+from Patterns.Still_Lifes import *
+from Patterns.Oscillators import *
+from Patterns.Spaceships import *
+from Patterns.starters import *
+
+# registry of every placeable pattern by category and name, pattern_io adds loaded files to it
+patterns = {"oscillators": {"blinker": blinker, "toad": toad, "beacon": beacon, "pulsar": pulsar},
+            "still_lifes": {"block": block, "beehive": beeHive, "loaf": loaf},
+            "spaceships": {"glider": glider, "spaceship_l": spaceshipLight,
+                           "spaceship_m": spaceshipMiddle, "spaceship_h": spaceshipHeavy},
+            "starters": {"acorn": acorn}}
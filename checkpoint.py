@@ -0,0 +1,175 @@
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from engine import PackedLifeEngine, live_bounds, pack_grid, unpack_grid
+from hashlife import HashLifeEngine
+from rules import Rule, RuleEngine
+
+MAGIC = b"GOLCKPT\x00"
+VERSION = 2
+
+# magic, version, bits per cell, flags, rule length, rows, cols, iteration, population, bounding box x, y, width,
+# height with -1 for an empty board. The rule follows and the payload starts at the next multiple of 64 bytes.
+# Version 1 stored bits as a 16 bit field, which reads the same as bits followed by no flags.
+_HEADER = struct.Struct("<8sHBBIQQQQqqqq")
+_ALIGN = 64
+
+# the payload covers the bounding box of a board on an unbounded plane instead of the rows x cols window
+_UNBOUNDED = 1
+
+# bounded is False when the payload covers the bounding box rather than the window
+Checkpoint = namedtuple("Checkpoint", ["shape", "iteration", "population", "bounding_box", "rule", "payload",
+                                       "bounded"])
+
+
+def _payload_offset(rule_length: int) -> int:
+    return -(-(_HEADER.size + rule_length) // _ALIGN) * _ALIGN
+
+
+def save_checkpoint(path, state, rule=None, band_rows: int = 4096):
+    """
+    Write a board to a checkpoint file. Two state boards are stored bit-packed with 64 cells per word, boards with
+    more states one byte per cell. The payload is written through a memory map in bands of rows, and the file is
+    only moved into place once complete, so a crash mid-write leaves the previous checkpoint intact. Engines on an
+    unbounded plane store the cells inside their live bounding box, wherever it lies.
+
+    :param path: file to write.
+    :param state: an engine, or anything with grid, iteration and population such as a worker Frame.
+    :param rule: rule the board runs, taken from state.rule when it has one and Life otherwise.
+    :param band_rows: rows packed at a time, bounding the memory used on top of the board.
+    """
+    if rule is None:
+        rule = getattr(state, "rule", "B3/S23")
+    rule = rule if isinstance(rule, Rule) else Rule(rule)
+    rule_text = str(rule).encode()
+
+    bounded = getattr(state, "bounded", True)
+    packed = state.packed if isinstance(state, PackedLifeEngine) else None
+    grid = None if packed is not None or not bounded else np.asarray(state.grid)
+    shape = tuple(state.shape) if grid is None else grid.shape
+    if len(shape) != 2:
+        raise ValueError(f"only single boards can be checkpointed, got shape {shape}")
+
+    bits = 1 if rule.states == 2 else 8
+
+    # a dense grid is counted as stored
+    if grid is None:
+        population, bounds = state.population, state.bounding_box()
+    else:
+        population, bounds = np.count_nonzero(grid == 1), live_bounds(grid == 1)
+    x, y, width, height = (-1, -1, -1, -1) if bounds is None else bounds
+
+    # the payload is the window of a bounded board, and the bounding box of an unbounded one
+    rows, cols = shape if bounded else (max(height, 0), max(width, 0))
+    words = -(-cols // 64)
+
+    offset = _payload_offset(len(rule_text))
+    payload_shape, dtype = ((rows, words), "<u8") if bits == 1 else ((rows, cols), np.uint8)
+
+    temporary = f"{os.fspath(path)}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, bits, 0 if bounded else _UNBOUNDED, len(rule_text), *shape,
+                                int(state.iteration), int(population), x, y, width, height))
+        file.write(rule_text)
+        file.truncate(offset + int(np.prod(payload_shape)) * np.dtype(dtype).itemsize)
+
+    if rows and cols:
+        payload = np.memmap(temporary, dtype=dtype, mode="r+", offset=offset, shape=payload_shape)
+        for start in range(0, rows, band_rows):
+            stop = min(start + band_rows, rows)
+            if packed is not None:
+                band = packed[start: stop]
+            else:
+                band = grid[start: stop] if bounded else state.window(x, y + start, stop - start, cols)
+                if bits == 1:
+                    band = pack_grid(band, words)
+            payload[start: stop] = band
+
+        payload.flush()
+        del payload
+
+    os.replace(temporary, path)
+
+
+def open_checkpoint(path, mode: str = "r") -> Checkpoint:
+    """
+    Read the header of a checkpoint and memory-map its payload, so nothing is read from the payload until used.
+
+    :param mode: np.memmap mode, "c" gives a private copy-on-write map that can be edited without touching the
+        file.
+    :return: Checkpoint with the payload as (rows, words) uint64 words for two state boards, or (rows, cols)
+        uint8 states otherwise. For a board on an unbounded plane rows and cols are those of the bounding box.
+    """
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{os.fspath(path)} is not a checkpoint")
+
+        (_, version, bits, flags, rule_length, shape_rows, shape_cols, iteration, population,
+         x, y, width, height) = _HEADER.unpack(header)
+        if version not in (1, VERSION):
+            raise ValueError(f"unsupported checkpoint version {version}")
+
+        rule = file.read(rule_length).decode()
+
+    bounded = not flags & _UNBOUNDED
+    rows, cols = (shape_rows, shape_cols) if bounded else (max(height, 0), max(width, 0))
+    payload_shape, dtype = ((rows, -(-cols // 64)), "<u8") if bits == 1 else ((rows, cols), np.uint8)
+    if rows and cols:
+        payload = np.memmap(path, dtype=dtype, mode=mode, offset=_payload_offset(rule_length), shape=payload_shape)
+    else:
+        payload = np.zeros(payload_shape, dtype=dtype)
+
+    bounds = None if width < 0 else (x, y, width, height)
+    return Checkpoint((shape_rows, shape_cols), iteration, population, bounds, rule, payload, bounded)
+
+
+def restore_checkpoint(path, engine=None):
+    """
+    Resume a board from a checkpoint. A PackedLifeEngine takes the memory-mapped words as its grid, so even
+    multi-GB boards resume without being read into memory up front. Other engines are filled from the unpacked
+    payload, and a board from an unbounded plane is added back at its bounding box.
+
+    :param engine: engine to restore into, with the same shape and rule as the checkpoint. If None, a
+        PackedLifeEngine is made for Life, a HashLifeEngine for Life on an unbounded plane and a RuleEngine for any
+        other rule.
+    :return: the restored engine.
+    """
+    checkpoint = open_checkpoint(path, mode="c")
+    rule = Rule(checkpoint.rule)
+    rows, cols = checkpoint.shape
+
+    if engine is None:
+        if not checkpoint.bounded:
+            if str(rule) != "B3/S23":
+                raise ValueError(f"no engine runs {rule} on an unbounded plane")
+            engine = HashLifeEngine(checkpoint.shape)
+        elif str(rule) == "B3/S23":
+            engine = PackedLifeEngine(checkpoint.shape)
+        else:
+            engine = RuleEngine(checkpoint.shape, rule=rule)
+    elif tuple(engine.shape) != checkpoint.shape:
+        raise ValueError(f"checkpoint shape {checkpoint.shape} does not match engine shape {engine.shape}")
+    elif str(getattr(engine, "rule", "B3/S23")) != str(rule):
+        raise ValueError(f"checkpoint rule {rule} does not match the engine's rule")
+    elif not checkpoint.bounded and engine.bounded:
+        raise ValueError("checkpoint holds a board on an unbounded plane, restore it into an unbounded engine")
+
+    if not checkpoint.bounded:
+        engine.reset()
+        if checkpoint.bounding_box is not None:
+            x, y, width = checkpoint.bounding_box[:3]
+            grid = unpack_grid(checkpoint.payload, width) if rule.states == 2 else np.asarray(checkpoint.payload)
+            engine.add_pattern(grid, x, y)
+    elif isinstance(engine, PackedLifeEngine):
+        engine.set_packed(checkpoint.payload, checkpoint.population, checkpoint.bounding_box)
+    elif rule.states == 2:
+        engine.grid = unpack_grid(checkpoint.payload, cols)
+    else:
+        engine.grid = checkpoint.payload
+
+    engine.iteration = checkpoint.iteration
+    return engine
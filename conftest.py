@@ -0,0 +1,2 @@
+# pybag_test.py is a pygame demo that opens a window at import, not a test module
+collect_ignore = ["pybag_test.py"]
@@ -0,0 +1,114 @@
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+Cycle = namedtuple("Cycle", ["start", "period"])
+
+
+def zobrist_keys(indices: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Pseudo-random 64 bit key for every flat cell index, computed with splitmix64 so no per-cell table is stored.
+    """
+    with np.errstate(over="ignore"):
+        z = indices.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15 * (seed + 1) & 0xFFFFFFFFFFFFFFFF)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class CycleDetector:
+    def __init__(self, history: int = 4096, seed: int = 0):
+        """
+        Detects when a board becomes periodic. Every generation is reduced to a Zobrist hash, updated
+        incrementally from the cells that changed, and kept in a bounded history of hash -> iteration.
+
+        :param history: number of generations remembered, the longest period that can be detected.
+        :param seed: seed for the Zobrist keys.
+        """
+        self.history = history
+        self.seed = seed
+
+        self.hash = None
+        self.cycle = None
+
+        self._seen = OrderedDict()
+        self._previous = None
+
+    def reset(self):
+        self.hash = None
+        self.cycle = None
+        self._seen.clear()
+        self._previous = None
+
+    def update(self, grid: np.ndarray, iteration: int, population: int = None):
+        """
+        Hash the grid at the given iteration.
+
+        :param population: live cells of the whole board. Engines on an unbounded plane only return the window of
+            it as their grid, and while some live cells lie outside the window the grid doesn't identify the
+            state, so it is neither looked up nor remembered.
+        :return: the Cycle, once the grid repeats a state still in the history, otherwise None.
+        """
+        grid = np.asarray(grid)
+
+        if self._previous is None or self._previous.shape != grid.shape:
+            self._previous = (grid != 0).astype(np.uint8)
+            self.hash = int(np.bitwise_xor.reduce(zobrist_keys(np.flatnonzero(self._previous), self.seed)))
+        else:
+            changed = np.flatnonzero(np.not_equal(grid != 0, self._previous))
+            self.hash ^= int(np.bitwise_xor.reduce(zobrist_keys(changed, self.seed)))
+            np.not_equal(grid, 0, out=self._previous.view(bool))
+
+        if population is not None and np.count_nonzero(self._previous) < population:
+            return self.cycle
+
+        if self.cycle is None:
+            first = self._seen.get(self.hash)
+            if first is not None and first < iteration:
+                self.cycle = Cycle(first, iteration - first)
+
+        self._seen[self.hash] = self._seen.get(self.hash, iteration)
+        while len(self._seen) > self.history:
+            self._seen.popitem(last=False)
+
+        return self.cycle
+
+    def equivalent_generation(self, target: int) -> int:
+        """
+        Earliest generation with the same state as target, once a cycle has been found.
+        """
+        start, period = self.cycle
+        if target < start:
+            return target
+        return start + (target - start) % period
+
+    def fast_forward(self, engine, target: int):
+        """
+        Move an engine that has entered the detected cycle to generation target, stepping at most one period.
+        """
+        start, period = self.cycle
+        if engine.iteration < start or target < engine.iteration:
+            raise ValueError("engine must be inside the cycle and target ahead of it")
+
+        engine.step((target - engine.iteration) % period)
+        engine.iteration = target
+
+
+def run_until_cycle(engine, max_generations: int, detector: CycleDetector = None):
+    """
+    Step an engine one generation at a time until it becomes periodic or max_generations have run.
+
+    :return: the Cycle, or None if none was found.
+    """
+    if detector is None:
+        detector = CycleDetector()
+
+    cycle = detector.update(engine.grid, engine.iteration, engine.population)
+    for _ in range(max_generations):
+        if cycle is not None:
+            break
+
+        engine.step()
+        cycle = detector.update(engine.grid, engine.iteration, engine.population)
+
+    return cycle
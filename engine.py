@@ -0,0 +1,628 @@
+from collections import namedtuple
+
+import numpy as np
+
+# per-generation counters kept as by-products of stepping. bounding_box is (x, y, width, height) of the live
+# cells, or None for an empty board
+StepStats = namedtuple("StepStats", ["iteration", "population", "births", "deaths", "bounding_box"])
+
+# bounding box not worked out since the grid last changed
+_STALE = object()
+
+
+def count_neighbours(grid: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Count the live Moore neighbours of every cell. Cells beyond the edge of the grid are treated as dead,
+    matching the cv2.BORDER_CONSTANT behaviour of the original convolution.
+
+    :param grid: array of 0/1 cells. Counting runs over the last two axes, so a stack of boards is handled in
+        one call.
+    :param out: optional preallocated uint8 array to write the counts into.
+    :return: array of neighbour counts.
+    """
+    if out is None:
+        out = np.zeros(grid.shape, dtype=np.uint8)
+    else:
+        out.fill(0)
+
+    out[..., 1:, :] += grid[..., :-1, :]
+    out[..., :-1, :] += grid[..., 1:, :]
+    out[..., :, 1:] += grid[..., :, :-1]
+    out[..., :, :-1] += grid[..., :, 1:]
+    out[..., 1:, 1:] += grid[..., :-1, :-1]
+    out[..., 1:, :-1] += grid[..., :-1, 1:]
+    out[..., :-1, 1:] += grid[..., 1:, :-1]
+    out[..., :-1, :-1] += grid[..., 1:, 1:]
+
+    return out
+
+
+def live_bounds(grid: np.ndarray, x: int = 0, y: int = 0):
+    """
+    Bounding box (x, y, width, height) of the live cells in a dense grid whose top left corner is at (x, y), or
+    None if there are none.
+    """
+    rows = np.flatnonzero(grid.any(axis=1))
+    if not rows.size:
+        return None
+
+    cols = np.flatnonzero(grid[rows[0]: rows[-1] + 1].any(axis=0))
+    return int(x + cols[0]), int(y + rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+def stamp_patterns(grid: np.ndarray, patterns, ids, xs, ys, x: int = 0, y: int = 0, chunk_cells: int = 1 << 20):
+    """
+    OR many pattern instances into a dense grid. Every pattern is turned into a table of live cell offsets once,
+    and all instances of it are scattered through flat indices in a single vectorised assignment per chunk.
+    Cells falling outside the grid are clipped.
+
+    :param grid: C-contiguous (rows, cols) array written in place, with its top left corner at column x, row y.
+    :param patterns: sequence of 0/1 arrays, indexed by ids.
+    :param ids: pattern index of every instance.
+    :param xs: column of the top left corner of every instance.
+    :param ys: row of the top left corner of every instance.
+    :param chunk_cells: cells scattered at a time, bounding the size of the index arrays.
+    """
+    ids, xs, ys = (np.asarray(values, dtype=np.int64).ravel() for values in (ids, xs, ys))
+    rows, cols = grid.shape
+    flat = grid.reshape(-1)
+
+    for index, pattern in enumerate(patterns):
+        dy, dx = np.nonzero(pattern)
+        instances = np.flatnonzero(ids == index)
+        if not dy.size or not instances.size:
+            continue
+
+        step = max(1, chunk_cells // dy.size)
+        for start in range(0, instances.size, step):
+            chosen = instances[start: start + step]
+            r = (ys[chosen] - y)[:, None] + dy
+            c = (xs[chosen] - x)[:, None] + dx
+
+            inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+            flat[r[inside] * cols + c[inside]] = 1
+
+
+def pattern_clusters(patterns, ids, xs, ys, tile: int = 256):
+    """
+    Group pattern instances by the tile their top left corner falls in and stamp every group into its own block,
+    so instances far apart never share a block covering the space between them.
+
+    :param patterns: sequence of 0/1 arrays, indexed by ids.
+    :param ids: pattern index of every instance.
+    :param xs: column of the top left corner of every instance.
+    :param ys: row of the top left corner of every instance.
+    :param tile: edge length of the square tiles instances are grouped by.
+    :return: iterator of (block, x, y), each block's top left corner being at column x, row y.
+    """
+    ids, xs, ys = (np.asarray(values, dtype=np.int64).ravel() for values in (ids, xs, ys))
+    if not ids.size:
+        return
+
+    heights = np.array([np.shape(pattern)[0] for pattern in patterns], dtype=np.int64)
+    widths = np.array([np.shape(pattern)[1] for pattern in patterns], dtype=np.int64)
+
+    # instances sorted by tile, split wherever the tile changes
+    _, group = np.unique(np.stack((ys // tile, xs // tile), axis=1), axis=0, return_inverse=True)
+    group = group.ravel()
+    order = np.argsort(group, kind="stable")
+    for members in np.split(order, np.flatnonzero(np.diff(group[order])) + 1):
+        x0, y0 = int(xs[members].min()), int(ys[members].min())
+        x1 = int((xs[members] + widths[ids[members]]).max())
+        y1 = int((ys[members] + heights[ids[members]]).max())
+
+        block = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        stamp_patterns(block, patterns, ids[members], xs[members], ys[members], x0, y0)
+        yield block, x0, y0
+
+
+class LifeEngine:
+    # whether the grid is the whole board, engines on an unbounded plane keep cells outside it
+    bounded = True
+
+    def __init__(self, shape, grid: np.ndarray = None):
+        """
+        Headless Game of Life simulation. Holds the grid state and advances it without any dependency on
+        pygame or cv2, so boards can be stepped on machines without a display.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state, copied into the engine.
+        """
+        self.shape = tuple(int(size) for size in shape)
+        self.iteration = 0
+        self.population = 0
+        self.births = 0
+        self.deaths = 0
+        self._bounds = _STALE
+
+        self._grid = self._empty_grid()
+
+        if grid is not None:
+            self.grid = grid
+        else:
+            self._refresh()
+
+    @property
+    def grid(self) -> np.ndarray:
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid: np.ndarray):
+        self._set_grid(self._check_shape(grid))
+        self._refresh()
+
+    def _check_shape(self, grid: np.ndarray) -> np.ndarray:
+        grid = np.asarray(grid)
+        if grid.shape != self.shape:
+            raise ValueError(f"grid shape {grid.shape} does not match engine shape {self.shape}")
+        return grid
+
+    def _set_grid(self, grid: np.ndarray):
+        # store a grid of the engine's shape in the engine's own representation, the grid setter recounts after
+        self._grid = (grid != 0).astype(np.uint8)
+
+    @property
+    def stats(self) -> StepStats:
+        return StepStats(self.iteration, self.population, self.births, self.deaths, self.bounding_box())
+
+    def bounding_box(self):
+        # only searched for when asked, so stepping doesn't pay for it
+        if self._bounds is _STALE:
+            self._bounds = self._find_bounds()
+        return self._bounds
+
+    def _empty_grid(self) -> np.ndarray:
+        return np.zeros(self.shape, dtype=np.uint8)
+
+    def count_population(self) -> int:
+        return int(np.count_nonzero(self._grid))
+
+    def _find_bounds(self):
+        return live_bounds(self.grid)
+
+    def _refresh(self):
+        # full recount after the grid was edited from outside, stepping keeps these up to date incrementally
+        self.population = self.count_population()
+        self.births = 0
+        self.deaths = 0
+        self._bounds = _STALE
+
+    def _search_window(self, margin: int = 1):
+        """
+        Rows and columns that can hold live cells next generation, as (r0, r1, c0, c1): the live bounding box
+        grown by margin cells and clipped to the grid, or None for an empty board.
+        """
+        bounds = self.bounding_box()
+        if bounds is None:
+            return None
+
+        x, y, width, height = bounds
+        return (max(y - margin, 0), min(y + height + margin, self.shape[-2]),
+                max(x - margin, 0), min(x + width + margin, self.shape[-1]))
+
+    def _record_step(self, old: np.ndarray, new: np.ndarray, changed: np.ndarray = None):
+        """
+        Update population, births, deaths and bounding box from the previous and new dense 0/1 grids with one
+        XOR and two counts, only looking inside the search window. Every changed cell is a birth or a death, and
+        births minus deaths is the change in population.
+
+        :param changed: optional buffer of the grid's shape and dtype that is free to overwrite, to hold old ^ new
+            without allocating.
+        """
+        window = self._search_window()
+        if window is None:
+            self._set_counts(0, 0, None)
+            return
+
+        r0, r1, c0, c1 = window
+        old, new = old[r0: r1, c0: c1], new[r0: r1, c0: c1]
+        if changed is not None:
+            changed = changed[r0: r1, c0: c1]
+
+        population = int(np.count_nonzero(new))
+        flips = int(np.count_nonzero(np.bitwise_xor(old, new, out=changed)))
+        self._set_counts(population, flips, live_bounds(new, c0, r0))
+
+    def _set_counts(self, population: int, flips: int, bounds=_STALE):
+        self.births = (flips + population - self.population) // 2
+        self.deaths = flips - self.births
+        self.population = population
+        self._bounds = bounds
+
+    def reset(self):
+        self._grid = self._empty_grid()
+        self.iteration = 0
+        self._refresh()
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int):
+        """
+        Logically OR a pattern into the grid with its top left corner at column x, row y. Cells falling outside
+        the grid are clipped.
+        """
+        pattern, x, y = self._clip(pattern, x, y)
+        section = self._grid[y: y + pattern.shape[0], x: x + pattern.shape[1]]
+        np.logical_or(section, pattern[:section.shape[0], :section.shape[1]], out=section, casting="unsafe")
+        self._refresh()
+
+    @staticmethod
+    def _clip(pattern: np.ndarray, x: int, y: int):
+        # drop the rows and columns of a pattern above or left of the grid, slicing clips the bottom and right
+        x, y = int(x), int(y)
+        return pattern[max(-y, 0):, max(-x, 0):], max(x, 0), max(y, 0)
+
+    def add_patterns(self, patterns, ids, xs, ys):
+        """
+        Logically OR many pattern instances into the grid at once, instance i being patterns[ids[i]] with its top
+        left corner at column xs[i], row ys[i]. On bounded engines the instances are stamped into one block covering
+        them all, clipped to the grid, which is then added with a single add_pattern call. Engines on an unbounded
+        plane add a block per cluster of nearby instances instead, so the cost follows the instances rather than
+        the space between them.
+        """
+        ids, xs, ys = (np.asarray(values, dtype=np.int64).ravel() for values in (ids, xs, ys))
+        if not ids.size:
+            return
+
+        if not self.bounded:
+            for block, x, y in pattern_clusters(patterns, ids, xs, ys):
+                self.add_pattern(block, x, y)
+            return
+
+        heights = np.array([np.shape(pattern)[0] for pattern in patterns], dtype=np.int64)
+        widths = np.array([np.shape(pattern)[1] for pattern in patterns], dtype=np.int64)
+        x0, y0 = max(int(xs.min()), 0), max(int(ys.min()), 0)
+        x1 = min(int((xs + widths[ids]).max()), self.shape[-1])
+        y1 = min(int((ys + heights[ids]).max()), self.shape[-2])
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        block = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        stamp_patterns(block, patterns, ids, xs, ys, x0, y0)
+        self.add_pattern(block, x0, y0)
+
+    def step(self, n: int = 1):
+        for _ in range(n):
+            self._step()
+            self.iteration += 1
+
+    def _step(self):
+        old = self._grid
+        neighbours = count_neighbours(old)
+
+        new = ((neighbours == 3) | ((neighbours == 2) & (old == 1))).astype(np.uint8)
+        # the search window comes from the old grid's bounds, so record before swapping in the new one
+        self._record_step(old, new)
+        self._grid = new
+
+
+# number of set bits in every possible byte value
+_POPCOUNT8 = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def pack_grid(grid: np.ndarray, words: int) -> np.ndarray:
+    """
+    Pack a dense (rows, cols) grid into (rows, words) uint64 words, one bit per cell. Column c is stored in
+    bit c % 64 of word c // 64.
+    """
+    rows, cols = grid.shape
+    padded = np.zeros((rows, words * 64), dtype=np.uint8)
+    padded[:, :cols] = grid != 0
+
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8").astype(np.uint64, copy=False)
+
+
+def popcount(words: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(_POPCOUNT8[np.ascontiguousarray(words).view(np.uint8)].sum(dtype=np.int64))
+
+
+def unpack_grid(packed: np.ndarray, cols: int) -> np.ndarray:
+    as_bytes = packed.astype("<u8", copy=False).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :cols]
+
+
+class PackedLifeEngine(LifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None):
+        """
+        Bit-packed engine storing 64 cells per uint64 word. Neighbours are counted with bitwise full adders, so
+        each generation works on whole words and the board needs 1/8 of the memory of a uint8 grid.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state, copied into the engine.
+        """
+        self.words = -(-int(shape[1]) // 64)
+
+        # bits of the final word that lie inside the grid
+        tail = int(shape[1]) - 64 * (self.words - 1)
+        self._tail_mask = np.uint64((1 << tail) - 1)
+
+        super().__init__(shape, grid)
+
+    def _empty_grid(self) -> np.ndarray:
+        return np.zeros((self.shape[0], self.words), dtype=np.uint64)
+
+    @LifeEngine.grid.getter
+    def grid(self) -> np.ndarray:
+        return unpack_grid(self._grid, self.shape[1])
+
+    def _set_grid(self, grid: np.ndarray):
+        self._grid = pack_grid(grid, self.words)
+
+    @property
+    def packed(self) -> np.ndarray:
+        return self._grid
+
+    def set_packed(self, words: np.ndarray, population: int = None, bounds=None):
+        """
+        Adopt (rows, words) uint64 words as the grid without copying them, for example a memory-mapped
+        checkpoint. The words are only read until the first step or edit.
+
+        :param population: population of the words if already known, otherwise it and bounds are recounted.
+        :param bounds: bounding box of the words, only used along with population.
+        """
+        if words.shape != self._grid.shape:
+            raise ValueError(f"packed shape {words.shape} does not match engine words {self._grid.shape}")
+
+        self._grid = words
+        if population is None:
+            self._refresh()
+        else:
+            self.population = population
+            self.births = self.deaths = 0
+            self._bounds = bounds
+
+    def count_population(self) -> int:
+        return popcount(self._grid)
+
+    def _find_bounds(self):
+        return self._packed_bounds(self._grid, 0)
+
+    @staticmethod
+    def _packed_bounds(words: np.ndarray, row_offset: int, word_offset: int = 0):
+        rows = np.flatnonzero(words.any(axis=1))
+        if not rows.size:
+            return None
+
+        # columns in use across the live rows, as one row of words
+        columns = np.bitwise_or.reduce(words[rows[0]: rows[-1] + 1], axis=0)
+        used = np.flatnonzero(columns) + word_offset
+        first, last = int(columns[used[0] - word_offset]), int(columns[used[-1] - word_offset])
+        left = 64 * int(used[0]) + (first & -first).bit_length() - 1
+        right = 64 * int(used[-1]) + last.bit_length() - 1
+
+        return left, row_offset + int(rows[0]), right - left + 1, int(rows[-1] - rows[0] + 1)
+
+    def _record_step(self, old: np.ndarray, new: np.ndarray, changed: np.ndarray = None):
+        window = self._search_window()
+        if window is None:
+            self._set_counts(0, 0, None)
+            return
+
+        # counted on the words covering the search window, 64 cells at a time
+        r0, r1, c0, c1 = window
+        w0, w1 = c0 // 64, (c1 - 1) // 64 + 1
+        old, new = old[r0: r1, w0: w1], new[r0: r1, w0: w1]
+        if changed is not None:
+            changed = changed[r0: r1, w0: w1]
+
+        self._set_counts(popcount(new), popcount(np.bitwise_xor(old, new, out=changed)),
+                         self._packed_bounds(new, r0, w0))
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int):
+        pattern, x, y = self._clip(pattern, x, y)
+        rows = self.grid_rows(y, y + pattern.shape[0])
+        section = rows[:, x: x + pattern.shape[1]]
+        np.logical_or(section, pattern[:section.shape[0], :section.shape[1]], out=section, casting="unsafe")
+
+        self._grid[y: y + rows.shape[0]] = pack_grid(rows, self.words)
+        self._refresh()
+
+    def grid_rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Unpack a band of rows without materialising the whole grid.
+        """
+        return unpack_grid(self._grid[start: stop], self.shape[1])
+
+    def _step(self):
+        one, top = np.uint64(1), np.uint64(63)
+        centre = self._grid
+
+        # west[c] holds the cell at column c - 1, east[c] the cell at column c + 1
+        west = centre << one
+        west[:, 1:] |= centre[:, :-1] >> top
+        east = centre >> one
+        east[:, :-1] |= centre[:, 1:] << top
+
+        # horizontal sums: full adder over (west, centre, east) for the rows above and below, half adder over
+        # (west, east) for the row itself
+        row_ones = west ^ centre ^ east
+        row_twos = (west & centre) | (east & (west ^ centre))
+        mid_ones = west ^ east
+        mid_twos = west & east
+
+        above_ones = np.zeros_like(centre)
+        above_twos = np.zeros_like(centre)
+        above_ones[1:], above_twos[1:] = row_ones[:-1], row_twos[:-1]
+
+        below_ones = np.zeros_like(centre)
+        below_twos = np.zeros_like(centre)
+        below_ones[:-1], below_twos[:-1] = row_ones[1:], row_twos[1:]
+
+        # total = ones + 2 * (carry + twos), where twos counts the three weight-two inputs
+        ones = above_ones ^ below_ones ^ mid_ones
+        carry = (above_ones & below_ones) | (mid_ones & (above_ones ^ below_ones))
+        twos = above_twos ^ below_twos ^ mid_twos
+        fours = (above_twos & below_twos) | (mid_twos & (above_twos ^ below_twos))
+
+        # alive next generation when total is 3, or total is 2 and the cell is alive: both need exactly one
+        # weight-two bit and no weight-four bit
+        new_grid = ~fours & (twos ^ carry) & (ones | centre)
+        new_grid[:, -1] &= self._tail_mask
+
+        self._record_step(centre, new_grid)
+        self._grid = new_grid
+
+
+class BufferedLifeEngine(LifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None):
+        """
+        Allocation-free engine. Two uint8 grids and a neighbour buffer are allocated once and every generation is
+        computed into the back buffer with out= arguments before the buffers are swapped. The array returned by
+        grid is reused two generations later, so copy it if it needs to be kept.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state, copied into the engine.
+        """
+        self._back = np.zeros(tuple(int(size) for size in shape), dtype=np.uint8)
+        self._neighbours = np.zeros_like(self._back)
+
+        super().__init__(shape, grid)
+
+    def _set_grid(self, grid: np.ndarray):
+        np.not_equal(grid, 0, out=self._grid.view(bool))
+
+    def reset(self):
+        self._grid.fill(0)
+        self.iteration = 0
+        self._refresh()
+
+    def _step(self):
+        neighbours = count_neighbours(self._grid, out=self._neighbours)
+
+        # neighbours | cell is 3 exactly when the cell has 3 neighbours, or is alive with 2
+        np.bitwise_or(neighbours, self._grid, out=neighbours)
+        np.equal(neighbours, 3, out=self._back.view(bool))
+
+        # the neighbour counts are used up, so their buffer holds the changed cells
+        self._record_step(self._grid, self._back, changed=neighbours)
+        self._grid, self._back = self._back, self._grid
+
+
+class TiledLifeEngine(LifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None, tile_size: int = 32):
+        """
+        Sparse engine that splits the grid into square tiles and only recomputes tiles that changed in the last
+        generation, plus their neighbours. Empty space and settled still lifes cost nothing per generation.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state, copied into the engine.
+        :param tile_size: edge length of a tile in cells.
+        """
+        self.tile_size = tile_size
+        self.tiles = (-(-int(shape[0]) // tile_size), -(-int(shape[1]) // tile_size))
+        self.active = np.ones(self.tiles, dtype=bool)
+
+        super().__init__(shape, grid)
+
+    def _set_grid(self, grid: np.ndarray):
+        super()._set_grid(grid)
+        self.active.fill(True)
+
+    def reset(self):
+        super().reset()
+        self.active.fill(False)
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int):
+        super().add_pattern(pattern, x, y)
+
+        x, y, size = int(x), int(y), self.tile_size
+        self.active[max(y // size - 1, 0): (y + pattern.shape[0] - 1) // size + 2,
+                    max(x // size - 1, 0): (x + pattern.shape[1] - 1) // size + 2] = True
+
+    def _step(self):
+        size = self.tile_size
+        rows, cols = self.shape
+        window = self._search_window()
+
+        # compute every active tile from the current grid before writing any of them back
+        updates = []
+        changed = np.zeros(self.tiles, dtype=bool)
+        flips = births = 0
+        for ty, tx in zip(*np.nonzero(self.active)):
+            r0, c0 = ty * size, tx * size
+            r1, c1 = min(r0 + size, rows), min(c0 + size, cols)
+            h0, w0 = max(r0 - 1, 0), max(c0 - 1, 0)
+
+            halo = self._grid[h0: r1 + 1, w0: c1 + 1]
+            neighbours = count_neighbours(halo)[r0 - h0: r0 - h0 + r1 - r0, c0 - w0: c0 - w0 + c1 - c0]
+            tile = self._grid[r0: r1, c0: c1]
+            new_tile = ((neighbours | tile) == 3).astype(np.uint8)
+
+            tile_flips = int(np.count_nonzero(new_tile != tile))
+            if tile_flips:
+                changed[ty, tx] = True
+                flips += tile_flips
+                births += int(np.count_nonzero(new_tile > tile))
+                updates.append((r0, r1, c0, c1, new_tile))
+
+        for r0, r1, c0, c1, new_tile in updates:
+            self._grid[r0: r1, c0: c1] = new_tile
+
+        bounds = None
+        if window is not None:
+            r0, r1, c0, c1 = window
+            bounds = live_bounds(self._grid[r0: r1, c0: c1], c0, r0)
+        self._set_counts(self.population + 2 * births - flips, flips, bounds)
+
+        # a tile can only change next generation if it or one of its neighbours changed this generation
+        active = changed.copy()
+        active[1:, :] |= changed[:-1, :]
+        active[:-1, :] |= changed[1:, :]
+        active[:, 1:] |= active[:, :-1].copy()
+        active[:, :-1] |= active[:, 1:].copy()
+        self.active = active
+
+
+class EnsembleLifeEngine(BufferedLifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None):
+        """
+        Steps a stack of independent boards together. Every operation of the buffered engine runs over the
+        whole (boards, rows, cols) array at once, so a parameter sweep costs one vectorised call per generation
+        instead of one per board.
+
+        :param shape: (boards, rows, cols) of the stack.
+        :param grid: optional starting stack, copied into the engine.
+        """
+        super().__init__(shape, grid)
+
+    def count_population(self) -> np.ndarray:
+        return np.count_nonzero(self._grid, axis=(1, 2))
+
+    def _find_bounds(self):
+        # not tracked per board for stacks
+        return None
+
+    def _refresh(self):
+        self.population = self.count_population()
+        self.births = np.zeros(self.shape[0], dtype=np.int64)
+        self.deaths = np.zeros(self.shape[0], dtype=np.int64)
+
+    def _record_step(self, old: np.ndarray, new: np.ndarray, changed: np.ndarray = None):
+        population = np.count_nonzero(new, axis=(1, 2))
+        flips = np.count_nonzero(np.bitwise_xor(old, new, out=changed), axis=(1, 2))
+        self._set_counts(population, flips)
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int, board: int = None):
+        """
+        Logically OR a pattern into one board, or into every board when board is None.
+        """
+        pattern, x, y = self._clip(pattern, x, y)
+        boards = slice(None) if board is None else slice(board, board + 1)
+
+        section = self._grid[boards, y: y + pattern.shape[0], x: x + pattern.shape[1]]
+        np.logical_or(section, pattern[:section.shape[1], :section.shape[2]], out=section, casting="unsafe")
+        self._refresh()
+
+    def step(self, n: int = 1) -> np.ndarray:
+        """
+        Advance every board n generations.
+
+        :return: (n, boards) array with the population of each board after every generation.
+        """
+        history = np.zeros((n, self.shape[0]), dtype=np.int64)
+        for generation in range(n):
+            self._step()
+            self.iteration += 1
+            history[generation] = self.population
+
+        return history
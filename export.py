@@ -0,0 +1,164 @@
+import queue
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# BGR colour of each cell state: dead cells white and live cells black like the display, and the dying states of
+# Generations rules grey
+default_palette = np.array([(255, 255, 255), (1, 1, 1)] + [(150, 150, 150)] * 254, dtype=np.uint8)
+
+
+def colour_map(grid: np.ndarray, palette: np.ndarray = default_palette, scale: int = 1) -> np.ndarray:
+    """
+    Convert a grid of cell states to a BGR image in one lookup into the palette, each cell becoming a scale by
+    scale block of pixels.
+    """
+    image = palette[grid]
+    if scale > 1:
+        image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+    return image
+
+
+class VideoExporter:
+    def __init__(self, path, shape, fps: float = 30, scale: int = 4, palette: np.ndarray = None,
+                 fourcc: str = "mp4v", queue_size: int = 16, block: bool = False, gif_frames: int = 600):
+        """
+        Streams grids to a video file from a background writer thread. add() only copies the grid onto a bounded
+        queue, and colour mapping and encoding happen on the writer thread, so exporting doesn't hold up
+        stepping. Files ending in .gif are written as an animated GIF, whose frames are kept until close since
+        the whole animation is encoded at once, so their number is capped by gif_frames.
+
+        :param path: output file, a .gif or any container cv2.VideoWriter can write.
+        :param shape: (rows, cols) of the grids.
+        :param fps: frames per second of the output.
+        :param scale: pixels per cell along each side.
+        :param palette: (states, 3) BGR colour of each cell state.
+        :param fourcc: codec for cv2.VideoWriter.
+        :param queue_size: frames waiting to be written before the queue is full.
+        :param block: wait for room when the queue is full. Otherwise the frame is dropped and counted in dropped.
+        :param gif_frames: most frames a GIF can hold, adding one more raises ValueError.
+        """
+        self.path = Path(path)
+        self.shape = tuple(int(size) for size in shape)
+        self.fps = fps
+        self.scale = scale
+        self.palette = default_palette if palette is None else np.asarray(palette, dtype=np.uint8)
+        self.block = block
+        self.gif_frames = gif_frames
+
+        self.written = 0
+        self.dropped = 0
+
+        self.gif = self.path.suffix.lower() == ".gif"
+        if self.gif:
+            if not hasattr(cv2, "imwriteanimation"):
+                raise RuntimeError("GIF export needs OpenCV 4.11 or newer")
+            self._writer = cv2.Animation()
+            self._gif_frames = []
+            self._gif_queued = 0
+        else:
+            size = (self.shape[1] * scale, self.shape[0] * scale)
+            self._writer = cv2.VideoWriter(str(self.path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+            if not self._writer.isOpened():
+                raise RuntimeError(f"could not open a video writer for {self.path}")
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, grid: np.ndarray) -> bool:
+        """
+        Queue a grid to be written as the next frame.
+
+        :return: False if the frame was dropped because the queue was full.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._thread is None:
+            raise ValueError("exporter is closed")
+
+        grid = np.asarray(grid)
+        if grid.shape != self.shape:
+            raise ValueError(f"grid shape {grid.shape} does not match exporter shape {self.shape}")
+        if self.gif and self._gif_queued >= self.gif_frames:
+            raise ValueError(f"a GIF holds at most {self.gif_frames} frames, export longer runs as video")
+
+        # engines reuse their buffers, so the queue holds a copy
+        try:
+            self._queue.put(grid.copy(), block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        if self.gif:
+            self._gif_queued += 1
+        return True
+
+    def close(self):
+        """
+        Write every queued frame and finish the file.
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        if self.gif:
+            self._writer.frames = self._gif_frames
+            self._writer.durations = [int(round(1000 / self.fps))] * len(self._gif_frames)
+            if self._gif_frames and self._error is None and not cv2.imwriteanimation(str(self.path), self._writer):
+                self._error = RuntimeError(f"could not write {self.path}")
+            self._gif_frames = []
+        else:
+            self._writer.release()
+
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            grid = self._queue.get()
+            if grid is None:
+                return
+            if self._error is not None:
+                continue
+
+            try:
+                frame = colour_map(grid, self.palette, self.scale)
+                if self.gif:
+                    self._gif_frames.append(frame)
+                else:
+                    self._writer.write(frame)
+                self.written += 1
+            except Exception as error:
+                # raised on the caller's thread by the next add or close
+                self._error = error
+
+
+def export_run(engine, path, generations: int, every: int = 1, **kwargs):
+    """
+    Step an engine headlessly and write a frame every so many generations, starting with its current state.
+
+    :param engine: engine to step, anything with the LifeEngine interface.
+    :param path: output file.
+    :param generations: generations to run.
+    :param every: generations between frames.
+    :param kwargs: passed on to VideoExporter. Frames are never dropped since nothing else is waiting.
+    """
+    kwargs["block"] = True
+    with VideoExporter(path, np.shape(engine.grid), **kwargs) as exporter:
+        exporter.add(engine.grid)
+        for _ in range(generations // every):
+            engine.step(every)
+            exporter.add(engine.grid)
@@ -4,23 +4,31 @@ from math import floor, ceil
 import cv2
 from enum import Enum
 import time
+import os
 
 import asyncio
 
-from screen import Screen, Colours, BlitLocation
+from screen import Screen, Colours, BlitLocation, LRUCache
 from game_screen import TouchScreen, GameButton, GameObjects
-
-from Patterns.Still_Lifes import *
-from Patterns.Oscillators import *
-from Patterns.Spaceships import *
-from Patterns.starters import *
+from engine import LifeEngine, PackedLifeEngine, BufferedLifeEngine, TiledLifeEngine
+from hashlife import HashLifeEngine
+from unbounded import UnboundedLifeEngine
+from parallel import ParallelLifeEngine
+from scheduler import FrameScheduler
+from worker import SimulationWorker
+from cycles import CycleDetector
+from rules import Rule, RuleEngine
+from checkpoint import save_checkpoint, restore_checkpoint
+from history import HistoryRecorder
+from export import VideoExporter
+
+from Patterns import patterns
 
 vec = pg.Vector2
-patterns = {"oscillators": {"blinker": blinker, "toad": toad, "beacon": beacon, "pulsar": pulsar},
-            "still_lifes": {"block": block, "beehive": beeHive, "loaf": loaf},
-            "spaceships": {"glider": glider, "spaceship_l": spaceshipLight,
-                           "spaceship_m": spaceshipMiddle, "spaceship_h": spaceshipHeavy},
-            "starters": {"acorn": acorn}}
+
+engines = {"dense": LifeEngine, "packed": PackedLifeEngine, "buffered": BufferedLifeEngine,
+           "tiled": TiledLifeEngine, "hashlife": HashLifeEngine, "unbounded": UnboundedLifeEngine,
+           "parallel": ParallelLifeEngine}
 
 move_directions = {
     pg.K_UP: vec(0, -1),
@@ -29,37 +37,63 @@ move_directions = {
     pg.K_RIGHT: vec(1, 0)
 }
 
+# right steps forward a generation while paused, left steps back through the recorded history
+step_keys = (pg.K_LEFT, pg.K_RIGHT)
+
+move_edges = {
+    pg.K_UP: "top",
+    pg.K_DOWN: "bottom",
+    pg.K_LEFT: "left",
+    pg.K_RIGHT: "right"
+}
+
 
 def create_grid_surface(grid: np.ndarray, surf_size: pg.Vector2,
                         colour=Colours.black, border=False, border_width=2) -> pg.Surface:
-    grid_surf = pg.Surface(surf_size, pg.SRCALPHA)
+    # one pixel per cell, written in a single pass through surfarray and then scaled up to the cell size
+    cell_surf = pg.Surface((grid.shape[1], grid.shape[0]), pg.SRCALPHA)
+
+    colour = colour.value
+    pixels = pg.surfarray.pixels3d(cell_surf)
+    pixels[...] = (colour.r, colour.g, colour.b)
+    alpha = pg.surfarray.pixels_alpha(cell_surf)
+    np.multiply(grid.T != 0, colour.a, out=alpha, casting="unsafe")
+
+    # release the surface locks held by the pixel arrays before scaling
+    del pixels, alpha
 
-    cell_size = vec(surf_size.x / grid.shape[1],
-                    surf_size.y / grid.shape[0])
+    return pg.transform.scale(cell_surf, (int(surf_size.x), int(surf_size.y)))
 
-    for rowIdx, row in enumerate(grid):
-        for colIdx, cell in enumerate(row):
-            rect = pg.Rect([colIdx * cell_size.x, rowIdx * cell_size.y], cell_size)
-            if cell:
-                # print(rowIdx, colIdx)
 
-                pg.draw.rect(grid_surf, colour.value, rect)
-            else:
-                pass
-                # pg.draw.rect(grid_surf, Colours.green.value, rect)
+# rendered pattern surfaces keyed by (category, name, cell size, colour). Each entry keeps the grid it was drawn
+# from so a pattern registered again under the same name is redrawn
+pattern_surfaces = LRUCache(256)
 
-    return grid_surf
+
+def pattern_surface(category, name, cell_size: float, colour=Colours.black) -> pg.Surface:
+    """
+    Surface of a registered pattern drawn at the given cell size, shared between every sprite that uses it.
+    """
+    grid = patterns[category][name]
+    key = (category, name, cell_size, colour)
+
+    cached = pattern_surfaces.get(key)
+    if cached is None or cached[0] is not grid:
+        surface = create_grid_surface(grid, cell_size * vec(grid.shape[1], grid.shape[0]), colour=colour)
+        cached = pattern_surfaces.put(key, (grid, surface))
+    return cached[1]
 
 
 class Pattern(pg.sprite.Sprite):
     def __init__(self, category, name, cell_size, pos=vec(10, 10), id=None):
         super().__init__()
+        self.category, self.name = category, name
         self.grid_pattern: np.ndarray = patterns[category][name]
         self.cell_size = cell_size.x
         # print(cell_size)
         self.surf_size = cell_size.x * (vec(self.grid_pattern.shape[1], self.grid_pattern.shape[0]))
         # print(surf_size)
-        self.image = create_grid_surface(self.grid_pattern, self.surf_size)
+        self.image = pattern_surface(category, name, self.cell_size)
         self.rect = pg.Rect(cell_size.x * pos, self.image.get_size())
         self.object_type = "pattern"
         self.pos = pos
@@ -69,12 +103,14 @@ class Pattern(pg.sprite.Sprite):
         self.edge_position = {"left": False, "right": False, "top": False, "bottom": False}
 
     def update_colour(self, colour: Colours):
-        self.image = create_grid_surface(self.grid_pattern, self.surf_size,
-                                         colour=colour)
+        self.image = pattern_surface(self.category, self.name, self.cell_size, colour=colour)
 
     def update_position(self, pos, grid_size: vec):
         self.pos = pos
         self.rect = pg.Rect(self.cell_size * self.pos, self.image.get_size())
+        for group in self.groups():
+            if isinstance(group, GameObjects):
+                group.reindex(self)
 
         self.edge_position["left"] = pos.x == 0
         self.edge_position["top"] = pos.y == 0
@@ -93,30 +129,69 @@ class Pattern(pg.sprite.Sprite):
 
 class GameOfLife:
     def __init__(self, cells: int = 80, frameless: bool = False, border: bool = False, border_width: int = 2,
-                 enable_async=False):
+                 enable_async=False, engine: str = "dense", speed: float = 100, frame_rate: float = 60,
+                 frame_budget: float = None, turbo: int = None, threaded: bool = False,
+                 detect_cycles: bool = False, rule: str = None, checkpoint: str = None,
+                 checkpoint_every: int = 10000, history_budget: int = None, record: str = None):
         """
 
         :param cells: number of cells to have within the grid.
         :param frameless:
         :param grid:
         :param grid_width:
+        :param engine: simulation backend, one of the keys of engines.
+        :param speed: generations per second while running, None for as fast as possible.
+        :param frame_rate: maximum rendered frames per second, independent of speed.
+        :param frame_budget: seconds of simulation per frame, None to adapt to the render cost.
+        :param turbo: only render once every this many generations.
+        :param threaded: step the engine on a background thread while running, rendering the latest frame.
+        :param detect_cycles: pause once the board becomes periodic. Only applies when stepping on the main thread.
+        :param rule: rulestring or key of named_rules to run instead of Life. Uses the rule engine, whatever the
+            choice of engine.
+        :param checkpoint: file to save checkpoints to, resumed from at start up if it already exists.
+        :param checkpoint_every: generations between checkpoints.
+        :param history_budget: bytes of compressed generation history to keep for scrubbing back with the left key
+            while paused, None to not record history.
+        :param record: video file to write every rendered frame of the run to.
         """
 
         # grid definition
         self.gridSize = vec(cells, cells)
-        self.grid = np.zeros([cells, cells])
+        if rule is None:
+            self.engine = engines[engine]((cells, cells))
+        else:
+            self.engine = RuleEngine((cells, cells), rule=rule)
         self.grid_init = None
 
-        # kernel (game rules) definition
-        self.kernel = np.ones([3, 3])
-        self.kernel[1, 1] = 0
+        self.checkpoint, self.checkpoint_every = checkpoint, checkpoint_every
+        if checkpoint is not None and os.path.exists(checkpoint):
+            restore_checkpoint(checkpoint, self.engine)
+        self.next_checkpoint = (self.engine.iteration // checkpoint_every + 1) * checkpoint_every
+
+        # a GIF is held in memory until the end and encoded at exit, so an open ended run is only recorded as video
+        if record is not None and str(record).lower().endswith(".gif"):
+            raise ValueError("record takes a video file such as .mp4, use export.export_run for GIFs")
+        self.exporter = VideoExporter(record, (cells, cells), fps=frame_rate) if record is not None else None
+
+        self.history = None
+        if history_budget is not None:
+            states = getattr(self.engine, "rule", Rule("life")).states
+            self.history = HistoryRecorder(budget=history_budget, states=states)
+
+        # background stepping, self.frame holds the frame being displayed while the worker runs. The worker records
+        # the history itself since the UI only sees the generations it happens to pick up
+        self.worker = SimulationWorker(self.engine, history=self.history) if threaded else None
+        self.frame = None
+
+        self.cycles = CycleDetector() if detect_cycles else None
+        self.pause_requested = False
 
         # game properties
         self.running = True
         self.fps = 100
-        self.iteration = 0
-        self.population = 0
         self.started = False
+        self.scheduler = FrameScheduler(speed=speed, frame_rate=frame_rate, frame_budget=frame_budget,
+                                        render_every=turbo)
 
         # graphics initialisation
         self.display_size, self.touch_size = vec(800, 800), vec(200, 800)
@@ -173,12 +248,14 @@ class GameOfLife:
         count = len(labels)
 
         self.likert_buttons = []
+        self.speed_settings = {}
         for idx in range(count):
             width = (self.touch_size.x - (count + 1) * gap) / count
             position = gap + idx * ((self.touch_size.x - (count + 1) * gap) / count + gap)
-            button = GameButton(pg.Vector2(position, (self.touch_size.y - 150) / 2), pg.Vector2(width, 150), idx,
+            button = GameButton(pg.Vector2(position, 605), pg.Vector2(width, 50), f"speed_{labels[idx]}",
                                 text=labels[idx], )
             self.likert_buttons.append(button)
+            self.speed_settings[button.id] = int(labels[idx])
 
         self.back_button = GameButton((25, 500), size=vec(150, 50), id="back",
                                       text="Back", colour=Colours.hero_blue)
@@ -189,21 +266,7 @@ class GameOfLife:
         self.end_button = GameButton((107, 725), pg.Vector2(70, 50),
                                      id="end", text="End", colour=Colours.red)
 
-        self.category_buttons = [GameButton(position=(25, 180 + 75 * idx),
-                                            size=(150, 50), id=name, text=name.replace("_", " ").title())
-                                 for idx, name in enumerate(patterns.keys())]
-        self.category_buttons.append(self.reset_button)
-        self.category_buttons.append(self.end_button)
-
-        self.button_sets = {cat_name:
-                                [GameButton(position=(25, 180 + 75 * idx), size=(150, 50), id=name,
-                                            text=name.replace("_", " ").title()) for idx, name in
-                                 enumerate(patterns[cat_name].keys())] for cat_name in patterns.keys()}
-
-        for button_set in self.button_sets.values():
-            button_set.append(self.back_button)
-
-        self.button_sets["category"] = self.category_buttons
+        self.build_pattern_buttons()
 
         self.touch_screen.sprites = GameObjects(self.button_sets["category"])
 
@@ -211,41 +274,138 @@ class GameOfLife:
 
         self.show_sprites = True
 
+        # grid currently drawn on display_screen.surface, diffed against the engine grid in load_update
+        self.drawn_grid = None
+        self.dirty_block = 16
+        self.hud_rects = [pg.Rect(0, 30, self.touch_size.x, 30), pg.Rect(0, 80, self.touch_size.x, 30)]
+
         self.update_display()
 
         self.pattern_category = None
         self.pattern_select = False
 
-        self.pattern_count = {pattern_type: {
-            pattern_name: 0 for pattern_name in patterns[pattern_type].keys()
-        } for pattern_type in patterns.keys()}
+        self.pattern_count = {}
 
         self.selected_pattern = None
 
         self.enable_async = enable_async
 
-    def update_display(self, display_screen=None, touch_screen=None):
+        # key held down for pattern movement or single stepping, repeated from the main loop without blocking
+        self.held_key = None
+        self.key_repeat_at = 0.0
+        self.move_interval = 0.05
+
+        # how often events are polled while nothing else is scheduled
+        self.idle_interval = 1 / 30
+
+    @property
+    def grid(self) -> np.ndarray:
+        if self.frame is not None:
+            return self.frame.grid
+        return self.engine.grid
+
+    @grid.setter
+    def grid(self, grid: np.ndarray):
+        self.engine.grid = grid
+
+    @property
+    def iteration(self) -> int:
+        if self.frame is not None:
+            return self.frame.iteration
+        return self.engine.iteration
+
+    @property
+    def population(self) -> int:
+        if self.frame is not None:
+            return self.frame.population
+        return self.engine.population
+
+    def start_worker(self):
+        if self.worker is not None:
+            self.worker.speed = self.scheduler.speed
+            self.worker.start()
+
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+        # also leaves a generation scrubbed back to in the history
+        self.frame = None
+
+    def update_display(self, display_screen=None, touch_screen=None, rects=None):
+        """
+        Composite the screens onto the window. When rects is given, only those areas of the display screen
+        and the HUD labels are redrawn and pushed with pg.display.update instead of a full flip.
+        """
         if display_screen is None:
             display_screen = self.display_screen
         if touch_screen is None:
             touch_screen = self.touch_screen
 
         self.touch_screen.refresh()
-        self.touch_screen.add_multiline_text(f"Iteration: {self.iteration}", pg.Rect(0, 30, self.touch_size.x, 30))
-        self.touch_screen.add_multiline_text(f"Population: {self.population}", pg.Rect(0, 80, self.touch_size.x, 30))
+        self.touch_screen.add_multiline_text(f"Iteration: {self.iteration}", self.hud_rects[0])
+        self.touch_screen.add_multiline_text(f"Population: {self.population}", self.hud_rects[1])
+
+        if rects is None:
+            self.left_screen.blit(display_screen.get_surface(self.show_sprites), (0, 0))
+            self.right_screen.blit(touch_screen.get_surface(), (0, 0))
+
+            # pg.display.set_caption(str.format("Iteration: {}", self.iteration))
+            pg.display.flip()
+            return
 
-        self.left_screen.blit(display_screen.get_surface(self.show_sprites), (0, 0))
-        self.right_screen.blit(touch_screen.get_surface(), (0, 0))
+        for rect in rects:
+            self.left_screen.blit(display_screen.base_surface, rect, area=rect)
+            self.left_screen.blit(display_screen.surface, rect, area=rect)
 
-        # pg.display.set_caption(str.format("Iteration: {}", self.iteration))
-        pg.display.flip()
+        touch_surf = touch_screen.get_surface()
+        for rect in self.hud_rects:
+            self.right_screen.blit(touch_surf, rect, area=rect)
+
+        pg.display.update(rects + [rect.move(self.display_size.x, 0) for rect in self.hud_rects])
+
+    def build_pattern_buttons(self):
+        """
+        Make the category and pattern buttons from the pattern registry as it stands.
+        """
+        self.pattern_layout = [(category, list(names)) for category, names in patterns.items()]
+
+        self.category_buttons = [GameButton(position=(25, 180 + 75 * idx),
+                                            size=(150, 50), id=name, text=name.replace("_", " ").title())
+                                 for idx, name in enumerate(patterns.keys())]
+        self.category_buttons.extend(self.likert_buttons)
+        self.category_buttons.append(self.reset_button)
+        self.category_buttons.append(self.end_button)
+
+        self.button_sets = {cat_name:
+                                [GameButton(position=(25, 180 + 75 * idx), size=(150, 50), id=name,
+                                            text=name.replace("_", " ").title()) for idx, name in
+                                 enumerate(patterns[cat_name].keys())] for cat_name in patterns.keys()}
+
+        for button_set in self.button_sets.values():
+            button_set.append(self.back_button)
+
+        self.button_sets["category"] = self.category_buttons
+
+    def update_pattern_buttons(self):
+        """
+        Rebuild the buttons if patterns were registered through pattern_io since they were made, keeping the
+        same set of buttons on show.
+        """
+        if self.pattern_layout == [(category, list(names)) for category, names in patterns.items()]:
+            return
+
+        self.build_pattern_buttons()
+        showing = self.pattern_category if self.pattern_select else "category"
+        self.touch_screen.sprites = GameObjects(self.button_sets.get(showing, self.category_buttons))
+        self.touch_screen.refresh()
 
     def addPattern(self, category, name, position: vec):
-        pattern_idx = self.pattern_count[category][name]
+        counts = self.pattern_count.setdefault(category, {})
+        pattern_idx = counts.setdefault(name, 0)
         new_pattern = Pattern(category, name, self.cell_size, pos=position,
                               id=f"{name}_{pattern_idx}")
 
-        self.pattern_count[category][name] += 1
+        counts[name] += 1
 
         self.display_screen.sprites.add(new_pattern)
 
@@ -253,44 +413,150 @@ class GameOfLife:
         # self.grid[int(position.y): int(position.y) + pattern.shape[0],
         # int(position.x): int(position.x) + pattern.shape[1]] = pattern
 
-    def iterate_grid(self):
-        neighbours = cv2.filter2D(self.grid, -1, self.kernel, borderType=cv2.BORDER_CONSTANT)
+    def add_patterns(self, names, ids, xs, ys, sprites: bool = False):
+        """
+        Place many patterns at once, instance i being names[ids[i]] with its top left corner at cell
+        (xs[i], ys[i]).
 
-        newGrid = np.zeros(self.grid.shape)
+        :param names: list of (category, name) of the patterns used.
+        :param sprites: add a movable sprite for every instance like addPattern. Otherwise the instances are
+            stamped straight into the engine in one vectorised pass and no sprites are made at all.
+        """
+        if sprites:
+            for index, x, y in zip(ids, xs, ys):
+                category, name = names[index]
+                self.addPattern(category, name, vec(int(x), int(y)))
+            return
+
+        self.engine.add_patterns([patterns[category][name] for category, name in names], ids, xs, ys)
+        self.drawn_grid = None
+
+    def iterate_grid(self, generations: int = 1):
+        watch_cycles = self.cycles is not None and self.cycles.cycle is None
+        if not watch_cycles and self.history is None:
+            self.engine.step(generations)
+            return
+
+        # one generation at a time so every generation is seen
+        for _ in range(generations):
+            self.engine.step()
+            if self.history is not None:
+                self.history.record(self.engine.grid, self.engine.iteration, self.engine.population)
+
+            if watch_cycles:
+                cycle = self.cycles.update(self.engine.grid, self.engine.iteration, self.engine.population)
+                if cycle is not None:
+                    print(f"board is periodic: period {cycle.period} from generation {cycle.start}")
+                    self.pause_requested = True
+                    break
+
+    def scrub(self, offset: int):
+        """
+        Show the recorded generation offset generations from the one displayed. Reaching the engine's generation
+        goes back to showing the live board.
+        """
+        target = self.iteration + offset
+        if target >= self.engine.iteration:
+            self.frame = None
+        elif self.history is not None and target in self.history:
+            self.frame = self.history.seek(target)
+        else:
+            return
 
-        newGrid[np.logical_and(neighbours == 3, self.grid == 0)] = 1
-        newGrid[np.logical_and(np.logical_or(neighbours == 2, neighbours == 3), self.grid == 1)] = 1
+        self.update_display(rects=self.load_update())
 
-        self.grid = newGrid
-        self.iteration += 1
+    def load_update(self):
+        """
+        Draw the grid onto the display screen. Once the sprites are hidden, only the blocks of cells that differ
+        from the previously drawn grid are redrawn.
 
-        self.population = np.count_nonzero(self.grid)
+        :return: list of dirty rects, or None if the whole screen was redrawn.
+        """
+        grid = self.grid
 
-    def load_update(self):
-        # TODO: create logical difference between new and previous grid
-        self.display_screen.refresh()
+        if self.show_sprites or self.drawn_grid is None or self.drawn_grid.shape != grid.shape:
+            self.display_screen.refresh()
+
+            cell_surf = create_grid_surface(grid, self.gridSize.elementwise() * self.cell_size)
+            self.display_screen.surface.blit(cell_surf, (0, 0))
 
-        newSurf = self.display_screen.surface.copy()
-        cellSurf = pg.Surface(self.display_size, pg.SRCALPHA)
+            self.drawn_grid = grid.copy()
+            return None
 
-        boarderWidth = 0
-        cellSize = (vec(newSurf.get_size()) - vec([(boarderWidth *
-                                                    (self.gridSize.x + 1)) for i in range(2)])) / self.gridSize.x
+        # blocks of cells containing any change, merged into horizontal runs
+        block = self.dirty_block
+        rows, cols = grid.shape
+        changed = np.not_equal(grid, self.drawn_grid)
+        padded = np.zeros((-(-rows // block) * block, -(-cols // block) * block), dtype=bool)
+        padded[:rows, :cols] = changed
+        dirty_blocks = padded.reshape(padded.shape[0] // block, block, -1, block).any(axis=(1, 3))
 
-        cellSize = vec(floor(cellSize.x), floor(cellSize.y))
+        rects = []
+        for block_row, row in enumerate(dirty_blocks):
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], row.view(np.int8), [0]))))
+            for start, stop in zip(edges[::2], edges[1::2]):
+                r0, r1 = block_row * block, min((block_row + 1) * block, rows)
+                c0, c1 = start * block, min(stop * block, cols)
 
-        for rowIdx, row in enumerate(self.grid):
-            for colIdx, cell in enumerate(row):
-                if cell:
-                    rect = pg.Rect([colIdx * cellSize.y, rowIdx * cellSize.x], cellSize)
-                    pg.draw.rect(cellSurf, [0, 0, 0], rect)
+                top_left = vec(round(c0 * self.cell_size.x), round(r0 * self.cell_size.y))
+                bottom_right = vec(round(c1 * self.cell_size.x), round(r1 * self.cell_size.y))
+                rect = pg.Rect(top_left, bottom_right - top_left)
 
-        self.display_screen.surface.blit(cellSurf, (0, 0))
+                self.display_screen.surface.fill((0, 0, 0, 0), rect)
+                self.display_screen.surface.blit(create_grid_surface(grid[r0: r1, c0: c1], vec(rect.size)), rect)
+                rects.append(rect)
+
+        np.copyto(self.drawn_grid, grid)
+        return rects
 
     def process_iteration(self):
         self.iterate_grid()
-        self.load_update()
-        self.update_display()
+        self.update_display(rects=self.load_update())
+        self.export_frame()
+
+    def export_frame(self):
+        if self.exporter is not None:
+            self.exporter.add(self.grid)
+
+    def process_frame(self):
+        """
+        Run however many generations the scheduler allows for this frame, then render if a frame is due. With a
+        background worker, pick up its latest published generation instead of stepping here.
+        """
+        if self.worker is not None and self.worker.running:
+            frame = self.worker.latest()
+            if frame is not None:
+                self.scheduler.record_generations(frame.iteration - self.iteration)
+                self.frame = frame
+        else:
+            start = time.monotonic()
+            generations = self.scheduler.generations_due(start)
+            if generations:
+                self.iterate_grid(generations)
+                self.scheduler.record_generations(generations, time.monotonic() - start)
+
+        if self.scheduler.frame_due():
+            render_start = time.monotonic()
+            self.update_display(rects=self.load_update())
+            self.scheduler.record_render(time.monotonic() - render_start)
+            self.export_frame()
+
+        self.save_checkpoint_due()
+
+    def save_checkpoint_due(self):
+        if self.checkpoint is None or self.iteration < self.next_checkpoint:
+            return
+
+        # the displayed frame while the worker owns the engine. A frame only holds the window, so the worker is
+        # paused to save engines with cells beyond it
+        state = self.frame if self.frame is not None and self.engine.bounded else self.engine
+        paused = state is self.engine and self.worker is not None and self.worker.running
+        if paused:
+            self.stop_worker()
+        save_checkpoint(self.checkpoint, state, rule=getattr(self.engine, "rule", None))
+        if paused:
+            self.start_worker()
+        self.next_checkpoint = (self.iteration // self.checkpoint_every + 1) * self.checkpoint_every
 
     def get_relative_mose_pos(self):
         mouse_pos = pg.mouse.get_pos()
@@ -307,28 +573,89 @@ class GameOfLife:
         print("finalising grid")
         # self.grid_init = self.display_screen.sprites.copy()
 
+        # every placed sprite stamped in one pass, grouped by the pattern it shows
+        grids, ids, xs, ys = {}, [], [], []
         for pattern in self.display_screen.sprites:
             pattern: Pattern
+            ids.append(grids.setdefault(id(pattern.grid_pattern), (len(grids), pattern.grid_pattern))[0])
+            xs.append(pattern.pos.x)
+            ys.append(pattern.pos.y)
 
-            grid_section = self.grid[int(pattern.pos.y): int(pattern.pos.y + pattern.shape.x),
-                           int(pattern.pos.x): int(pattern.pos.x + pattern.shape.y)]
+        self.engine.add_patterns([grid for _, grid in grids.values()], ids, xs, ys)
 
-            grid_section = np.logical_or(grid_section, pattern.grid_pattern)
+        if self.cycles is not None:
+            self.cycles.reset()
+            self.cycles.update(self.engine.grid, self.engine.iteration, self.engine.population)
 
-            self.grid[int(pattern.pos.y): int(pattern.pos.y + pattern.shape.x),
-            int(pattern.pos.x): int(pattern.pos.x + pattern.shape.y)] = grid_section
+        if self.history is not None:
+            self.history.reset()
+            self.history.record(self.engine.grid, self.engine.iteration, self.engine.population)
 
         # self.display_screen.kill_sprites()
         self.show_sprites = False
+
+        # clear the sprites drawn before the start and redraw the whole board, dirty frames only diff from there
+        self.display_screen.refresh()
+        self.drawn_grid = None
+        self.load_update()
         self.update_display()
 
+    def move_selected_pattern(self, key):
+        if not self.selected_pattern.edge_position[move_edges[key]]:
+            self.selected_pattern.update_position(self.selected_pattern.pos + move_directions[key], self.gridSize)
+
+        self.load_update()
+        self.update_display()
+
+    def press_key(self, key):
+        """
+        Act on a movement or step key immediately and schedule its repeat while it is held.
+        """
+        if not self.started and self.selected_pattern is not None and key in move_directions:
+            self.move_selected_pattern(key)
+            interval = self.move_interval
+        elif self.started and key in step_keys and not (self.worker is not None and self.worker.running):
+            self.step_key(key)
+            interval = 1 / self.fps
+        else:
+            return
+
+        self.held_key = key
+        self.key_repeat_at = time.monotonic() + interval
+
+    def step_key(self, key):
+        # right steps forward, through the history first when scrubbed back, left scrubs back through the history
+        if key == pg.K_LEFT:
+            self.scrub(-1)
+        elif self.frame is not None:
+            self.scrub(1)
+        else:
+            self.process_iteration()
+
+    def repeat_held_key(self, now):
+        if self.held_key is None or now < self.key_repeat_at:
+            return
+
+        if self.started and self.held_key in step_keys:
+            self.step_key(self.held_key)
+            self.key_repeat_at += 1 / self.fps
+        elif not self.started and self.selected_pattern is not None:
+            self.move_selected_pattern(self.held_key)
+            self.key_repeat_at += self.move_interval
+        else:
+            self.held_key = None
+            return
+
+        # skip repeats missed while a slow frame was running rather than replaying them in a burst
+        self.key_repeat_at = max(self.key_repeat_at, now)
+
     async def run(self):
         # self.load_update()
+        self.update_pattern_buttons()
         self.update_display()
         self.grid_init = self.display_screen.sprites.copy()
 
         auto = False
-        start = time.monotonic()
         while self.running:
             events = pg.event.get()
             for event in events:
@@ -341,6 +668,7 @@ class GameOfLife:
                     if screen == "disp":
                         click_test = self.display_screen.click_test(pos)
                     else:
+                        self.update_pattern_buttons()
                         click_test = self.touch_screen.click_test(pos)
 
                     if click_test:
@@ -348,11 +676,12 @@ class GameOfLife:
                         if obj_type == "button":
                             if obj_id == 1:
                                 # restart button
+                                self.stop_worker()
                                 self.show_sprites = True
-                                self.grid = np.zeros([int(self.gridSize.x), int(self.gridSize.y)])
-                                self.iteration = 0
+                                self.engine.reset()
                                 self.started = False
                                 self.display_screen.refresh()
+                                self.drawn_grid = None
 
                             elif obj_id == "back":
                                 self.touch_screen.sprites = GameObjects(self.category_buttons)
@@ -362,6 +691,12 @@ class GameOfLife:
 
                             elif obj_id == "end":
                                 auto = False
+                                self.stop_worker()
+
+                            elif obj_id in self.speed_settings:
+                                self.scheduler.speed = self.speed_settings[obj_id]
+                                if self.worker is not None:
+                                    self.worker.speed = self.scheduler.speed
 
                             elif self.pattern_select:
                                 self.addPattern(self.pattern_category, obj_id, vec(10, 10))
@@ -393,53 +728,12 @@ class GameOfLife:
                         self.load_update()
                         self.update_display()
 
-                elif event.type == pg.KEYDOWN:
-                    if not self.started and self.selected_pattern is not None:
-                        new_pos = self.selected_pattern.pos
-
-                        if event.key in move_directions:
-                            keyup = False
-                            while not keyup:
-
-                                move_events = pg.event.get()
-                                for move_event in move_events:
-                                    if move_event.type == pg.KEYUP:
-                                        keyup = True
-
-                                if event.key == pg.K_LEFT:
-                                    if not self.selected_pattern.edge_position["left"]:
-                                        new_pos += vec(-1, 0)
-                                elif event.key == pg.K_RIGHT:
-                                    if not self.selected_pattern.edge_position["right"]:
-                                        new_pos += vec(1, 0)
-                                elif event.key == pg.K_DOWN:
-                                    if not self.selected_pattern.edge_position["bottom"]:
-                                        new_pos += vec(0, 1)
-                                elif event.key == pg.K_UP:
-                                    if not self.selected_pattern.edge_position["top"]:
-                                        new_pos += vec(0, -1)
-
-                                self.selected_pattern.update_position(new_pos, self.gridSize)
-                                self.load_update()
-                                self.update_display()
-
-                                # Use to control movement speed of the patterns pre-initiation
-                                pg.time.wait(50)
-                                await asyncio.sleep(0)
+                elif event.type == pg.KEYUP:
+                    if event.key == self.held_key:
+                        self.held_key = None
 
-                    elif self.started:
-                        if event.key == pg.K_RIGHT:
-                            keyup = False
-                            start = time.monotonic()
-
-                            while not keyup:
-                                for event in pg.event.get():
-                                    if event.type == pg.KEYUP:
-                                        keyup = True
-
-                                if time.monotonic() - start >= (1 / self.fps):
-                                    start = time.monotonic()
-                                    self.process_iteration()
+                elif event.type == pg.KEYDOWN:
+                    self.press_key(event.key)
 
                     if event.key == pg.K_SPACE:
                         if not self.started:
@@ -450,14 +744,39 @@ class GameOfLife:
                             ...
 
                         auto = not auto
-                        start = time.monotonic()
+                        # resume from the live board when scrubbed back through the history
+                        self.frame = None
+                        self.scheduler.start()
+                        if auto:
+                            self.start_worker()
+                        else:
+                            self.stop_worker()
+
+            now = time.monotonic()
+            self.repeat_held_key(now)
+
+            if auto:
+                self.process_frame()
+
+                if self.pause_requested:
+                    auto = False
+                    self.pause_requested = False
+                    self.update_display(rects=self.load_update())
 
+            # sleep until the next frame or key repeat is due, polling for input at the idle rate when paused
+            now = time.monotonic()
+            deadline = now + self.idle_interval
             if auto:
-                if time.monotonic() - start >= (1 / self.fps):
-                    start = time.monotonic()
-                    self.process_iteration()
+                background = self.worker is not None and self.worker.running
+                deadline = min(deadline, self.scheduler.next_deadline(now, background=background))
+            if self.held_key is not None:
+                deadline = min(deadline, self.key_repeat_at)
+
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
 
-            await asyncio.sleep(0)
+        self.stop_worker()
+        if self.exporter is not None:
+            self.exporter.close()
 
 
 if __name__ == "__main__":
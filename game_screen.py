@@ -10,9 +10,9 @@ class TouchScreen(Screen):
 
     def click_test(self, pos):
         if self.sprites:
-            for sprite in self.sprites:
-                if sprite.is_clicked(pos):
-                    return sprite.click_return()
+            sprite = self.sprites.sprite_at(pos)
+            if sprite is not None:
+                return sprite.click_return()
 
         return None
 
@@ -28,11 +28,10 @@ class TouchScreen(Screen):
 
         display_surf = self.base_surface.copy()
         display_surf.blit(self.surface, (0, 0))
-        display_surf.blit(self.sprite_surface, (0, 0))
+        if show_sprites:
+            display_surf.blit(self.sprite_surface, (0, 0))
 
         return display_surf
 
     def get_object(self, object_id):
-        for game_object in self.sprites:
-            if game_object.id == object_id:
-                return game_object
\ No newline at end of file
+        return self.sprites.get_sprite(object_id)
\ No newline at end of file
@@ -0,0 +1,374 @@
+import numpy as np
+
+from engine import LifeEngine
+
+
+class Node:
+    __slots__ = ("k", "nw", "ne", "sw", "se", "population", "next")
+
+    def __init__(self, k, nw=None, ne=None, sw=None, se=None, population=0):
+        """
+        Canonical quadtree node covering a 2^k x 2^k square. Level 0 nodes are single cells. Nodes are only
+        created through HashLifeEngine.join, so two nodes with the same children are always the same object.
+        """
+        self.k = k
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+
+        # memoised successors, keyed by the log2 of the number of generations advanced
+        self.next = None
+
+
+class HashLifeEngine(LifeEngine):
+    bounded = False
+
+    def __init__(self, shape, grid: np.ndarray = None, max_nodes: int = 1_000_000):
+        """
+        HashLife engine. The universe is stored as a quadtree of canonicalised nodes and the centre of every node
+        is memoised after 2^j generations, so repetitive and periodic patterns can be advanced millions of
+        generations in a single step(n) call.
+
+        The universe is unbounded: shape only sets the window returned by grid, with its top left corner at
+        the origin. Cells leaving the window keep evolving and still count towards population.
+
+        :param shape: (rows, cols) of the window.
+        :param grid: optional starting state, copied into the engine.
+        :param max_nodes: node count above which the memo tables are discarded and the tree rebuilt.
+        """
+        self.max_nodes = max_nodes
+
+        self._nodes = {}
+        self._empty = []
+        self._bounds_memo = {}
+        self.off = Node(0)
+        self.on = Node(0, population=1)
+
+        # universe coordinates of the top left corner of the root node
+        self._origin = (0, 0)
+
+        super().__init__(shape, grid)
+
+    def _empty_grid(self) -> Node:
+        self._origin = (0, 0)
+        level = max(3, int(np.ceil(np.log2(max(self.shape)))))
+        return self.empty(level)
+
+    @property
+    def root(self) -> Node:
+        return self._grid
+
+    @LifeEngine.grid.getter
+    def grid(self) -> np.ndarray:
+        return self.window(0, 0, self.shape[0], self.shape[1])
+
+    def _set_grid(self, grid: np.ndarray):
+        self._grid = self._empty_grid()
+        self._grid = self._build(self._grid.k, 0, 0, grid != 0, 0, 0)
+
+    def count_population(self) -> int:
+        return self._grid.population
+
+    def _find_bounds(self):
+        # computed on demand from the tree instead
+        return None
+
+    def bounding_box(self):
+        bounds = self._node_bounds(self._grid)
+        if bounds is None:
+            return None
+
+        left, top, right, bottom = bounds
+        return self._origin[0] + left, self._origin[1] + top, right - left, bottom - top
+
+    def _node_bounds(self, node: Node):
+        # (left, top, right, bottom) of the live cells relative to the node's top left corner, memoised per node
+        if node.population == 0:
+            return None
+        if node.k == 0:
+            return 0, 0, 1, 1
+
+        bounds = self._bounds_memo.get(node)
+        if bounds is None:
+            half = 1 << (node.k - 1)
+            parts = []
+            for child, dx, dy in ((node.nw, 0, 0), (node.ne, half, 0), (node.sw, 0, half), (node.se, half, half)):
+                child_bounds = self._node_bounds(child)
+                if child_bounds is not None:
+                    parts.append((child_bounds[0] + dx, child_bounds[1] + dy,
+                                  child_bounds[2] + dx, child_bounds[3] + dy))
+
+            bounds = (min(part[0] for part in parts), min(part[1] for part in parts),
+                      max(part[2] for part in parts), max(part[3] for part in parts))
+            self._bounds_memo[node] = bounds
+
+        return bounds
+
+    def window(self, x: int, y: int, rows: int, cols: int) -> np.ndarray:
+        """
+        Render the cells of the universe inside [x, x + cols) x [y, y + rows) to a dense uint8 array.
+        """
+        out = np.zeros((rows, cols), dtype=np.uint8)
+        self._write(self._grid, self._origin[0] - x, self._origin[1] - y, out)
+        return out
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int):
+        x, y = int(x), int(y)
+
+        # grow the root until it covers the pattern
+        while True:
+            ox, oy = self._origin
+            size = 1 << self._grid.k
+            if ox <= x and oy <= y and x + pattern.shape[1] <= ox + size and y + pattern.shape[0] <= oy + size:
+                break
+            self._expand()
+
+        stamp = self._build(self._grid.k, *self._origin, np.asarray(pattern) != 0, x, y)
+        self._grid = self._union(self._grid, stamp)
+        self._refresh()
+
+    def leaf(self, cells: np.ndarray) -> Node:
+        """
+        Canonical node of the smallest level, at least 3, whose square holds cells with their top left corner at
+        the node's.
+        """
+        cells = np.asarray(cells) != 0
+        level = max(3, int(np.ceil(np.log2(max(cells.shape + (1,))))))
+        return self._build(level, 0, 0, cells, 0, 0)
+
+    def add_node(self, node: Node, x: int, y: int):
+        """
+        Logically OR a canonical node of this engine into the universe with its top left corner at column x,
+        row y, without expanding it to cells. Shared subtrees stay shared when x and y are not aligned to the
+        node's size, as every (subtree, offset) pair is only shifted once.
+        """
+        x, y = int(x), int(y)
+        size = 1 << node.k
+
+        while True:
+            ox, oy = self._origin
+            root = 1 << self._grid.k
+            if ox <= x and oy <= y and x + size <= ox + root and y + size <= oy + root:
+                break
+            self._expand()
+
+        stamp = self._shift(node, self._grid.k, x - self._origin[0], y - self._origin[1], {})
+        self._grid = self._union(self._grid, stamp)
+        self._refresh()
+
+    def _shift(self, node: Node, k: int, dx: int, dy: int, memo: dict) -> Node:
+        # node of level k holding the cells of node placed at (dx, dy) relative to its top left corner
+        size, node_size = 1 << k, 1 << node.k
+        if node.population == 0 or dx >= size or dy >= size or dx + node_size <= 0 or dy + node_size <= 0:
+            return self.empty(k)
+        if node.k == k and dx == dy == 0:
+            return node
+
+        key = (node, k, dx, dy)
+        shifted = memo.get(key)
+        if shifted is not None:
+            return shifted
+
+        if node.k >= k:
+            # the square is smaller than the node or straddles its children, so gather it child by child
+            half = node_size >> 1
+            shifted = self.empty(k)
+            for child, cx, cy in ((node.nw, 0, 0), (node.ne, half, 0), (node.sw, 0, half), (node.se, half, half)):
+                shifted = self._union(shifted, self._shift(child, k, dx + cx, dy + cy, memo))
+        else:
+            half = size >> 1
+            shifted = self.join(self._shift(node, k - 1, dx, dy, memo), self._shift(node, k - 1, dx - half, dy, memo),
+                                self._shift(node, k - 1, dx, dy - half, memo),
+                                self._shift(node, k - 1, dx - half, dy - half, memo))
+
+        memo[key] = shifted
+        return shifted
+
+    def step(self, n: int = 1):
+        """
+        Advance n generations, jumping 2^j generations for every bit j set in n. Births and deaths are not
+        tracked, since the intermediate generations are never materialised.
+        """
+        j = 0
+        remaining = n
+        while remaining:
+            if remaining & 1:
+                self._advance(j)
+            remaining >>= 1
+            j += 1
+
+        self.iteration += n
+        self.population = self.count_population()
+        self.births = self.deaths = None
+
+        if len(self._nodes) > self.max_nodes:
+            self._collect()
+
+    def empty(self, k: int) -> Node:
+        while len(self._empty) <= k:
+            if not self._empty:
+                self._empty.append(self.off)
+            else:
+                child = self._empty[-1]
+                self._empty.append(self.join(child, child, child, child))
+
+        return self._empty[k]
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(nw.k + 1, nw, ne, sw, se,
+                        nw.population + ne.population + sw.population + se.population)
+            self._nodes[key] = node
+
+        return node
+
+    def centre(self, node: Node) -> Node:
+        """
+        Return the node one level up with node in its centre and an empty border.
+        """
+        e = self.empty(node.k - 1)
+        return self.join(self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+                         self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+
+    def successor(self, node: Node, j: int) -> Node:
+        """
+        Return the centre 2^(k-1) square of a level k node advanced 2^j generations, for j <= k - 2.
+        """
+        if node.population == 0:
+            return self.empty(node.k - 1)
+
+        if node.next is None:
+            node.next = {}
+        elif j in node.next:
+            return node.next[j]
+
+        if node.k == 2:
+            result = self._life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            sub = [self.join(nw.nw, nw.ne, nw.sw, nw.se),
+                   self.join(nw.ne, ne.nw, nw.se, ne.sw),
+                   self.join(ne.nw, ne.ne, ne.sw, ne.se),
+                   self.join(nw.sw, nw.se, sw.nw, sw.ne),
+                   self.join(nw.se, ne.sw, sw.ne, se.nw),
+                   self.join(ne.sw, ne.se, se.nw, se.ne),
+                   self.join(sw.nw, sw.ne, sw.sw, sw.se),
+                   self.join(sw.ne, se.nw, sw.se, se.sw),
+                   self.join(se.nw, se.ne, se.sw, se.se)]
+
+            if j < node.k - 2:
+                # advance each of the nine overlapping squares by the full 2^j and stitch their centres
+                c = [self.successor(s, j) for s in sub]
+                result = self.join(self.join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                                   self.join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                                   self.join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                                   self.join(c[4].se, c[5].sw, c[7].ne, c[8].nw))
+            else:
+                # two half steps of 2^(j-1) generations each
+                c = [self.successor(s, j - 1) for s in sub]
+                result = self.join(self.successor(self.join(c[0], c[1], c[3], c[4]), j - 1),
+                                   self.successor(self.join(c[1], c[2], c[4], c[5]), j - 1),
+                                   self.successor(self.join(c[3], c[4], c[6], c[7]), j - 1),
+                                   self.successor(self.join(c[4], c[5], c[7], c[8]), j - 1))
+
+        node.next[j] = result
+        return result
+
+    def _life_4x4(self, node: Node) -> Node:
+        cells = [[0] * 4 for _ in range(4)]
+        for row, col, quad in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[row][col], cells[row][col + 1] = quad.nw.population, quad.ne.population
+            cells[row + 1][col], cells[row + 1][col + 1] = quad.sw.population, quad.se.population
+
+        new = []
+        for row, col in ((1, 1), (1, 2), (2, 1), (2, 2)):
+            neighbours = (sum(cells[row - 1][col - 1: col + 2]) + sum(cells[row + 1][col - 1: col + 2]) +
+                          cells[row][col - 1] + cells[row][col + 1])
+            alive = neighbours == 3 or (neighbours == 2 and cells[row][col])
+            new.append(self.on if alive else self.off)
+
+        return self.join(*new)
+
+    def _is_padded(self, node: Node) -> bool:
+        # all live cells lie in the central quarter-width square
+        return node.k >= 3 and (node.nw.se.se.population + node.ne.sw.sw.population +
+                                node.sw.ne.ne.population + node.se.nw.nw.population) == node.population
+
+    def _expand(self):
+        half = 1 << (self._grid.k - 1)
+        self._grid = self.centre(self._grid)
+        self._origin = (self._origin[0] - half, self._origin[1] - half)
+
+    def _advance(self, j: int):
+        # live cells travel at most 2^j cells, so they must start within 2^(k-3) of the centre of a level k node
+        # to still be inside the 2^(k-1) square returned by successor
+        while not self._is_padded(self._grid) or self._grid.k < j + 3:
+            self._expand()
+
+        quarter = 1 << (self._grid.k - 2)
+        self._grid = self.successor(self._grid, j)
+        self._origin = (self._origin[0] + quarter, self._origin[1] + quarter)
+
+    def _build(self, k: int, x0: int, y0: int, cells: np.ndarray, ax: int, ay: int) -> Node:
+        # node of level k with top left corner (x0, y0), taking cells from an array placed at (ax, ay)
+        size = 1 << k
+        left, top = max(x0, ax), max(y0, ay)
+        right, bottom = min(x0 + size, ax + cells.shape[1]), min(y0 + size, ay + cells.shape[0])
+        if left >= right or top >= bottom or not cells[top - ay: bottom - ay, left - ax: right - ax].any():
+            return self.empty(k)
+
+        if k == 0:
+            return self.on
+
+        half = size >> 1
+        return self.join(self._build(k - 1, x0, y0, cells, ax, ay),
+                         self._build(k - 1, x0 + half, y0, cells, ax, ay),
+                         self._build(k - 1, x0, y0 + half, cells, ax, ay),
+                         self._build(k - 1, x0 + half, y0 + half, cells, ax, ay))
+
+    def _write(self, node: Node, x0: int, y0: int, out: np.ndarray):
+        size = 1 << node.k
+        if node.population == 0 or x0 >= out.shape[1] or y0 >= out.shape[0] or x0 + size <= 0 or y0 + size <= 0:
+            return
+
+        if node.k == 0:
+            out[y0, x0] = 1
+            return
+
+        half = size >> 1
+        self._write(node.nw, x0, y0, out)
+        self._write(node.ne, x0 + half, y0, out)
+        self._write(node.sw, x0, y0 + half, out)
+        self._write(node.se, x0 + half, y0 + half, out)
+
+    def _union(self, a: Node, b: Node) -> Node:
+        if b.population == 0 or a is b:
+            return a
+        if a.population == 0:
+            return b
+        if a.k == 0:
+            return self.on
+
+        return self.join(self._union(a.nw, b.nw), self._union(a.ne, b.ne),
+                         self._union(a.sw, b.sw), self._union(a.se, b.se))
+
+    def _collect(self):
+        # drop the memo and canonical tables, keeping only the nodes reachable from the root
+        old_root = self._grid
+        self._nodes = {}
+        self._empty = []
+        self._bounds_memo = {}
+
+        copies = {}
+
+        def copy(node):
+            if node.k == 0:
+                return node
+            new = copies.get(node)
+            if new is None:
+                new = self.join(copy(node.nw), copy(node.ne), copy(node.sw), copy(node.se))
+                copies[node] = new
+            return new
+
+        self._grid = copy(old_root)
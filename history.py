@@ -0,0 +1,188 @@
+import bisect
+import zlib
+
+import numpy as np
+
+from worker import Frame
+
+eviction_policies = ("oldest", "keyframes")
+
+
+class _Segment:
+    # a compressed keyframe and the compressed XOR deltas of the generations that follow it
+    __slots__ = ("start", "keyframe", "deltas", "populations", "nbytes")
+
+    def __init__(self, start: int, keyframe: bytes, population: int):
+        self.start = start
+        self.keyframe = keyframe
+        self.deltas = []
+        self.populations = [population]
+        self.nbytes = len(keyframe)
+
+    @property
+    def stop(self) -> int:
+        # one past the last generation that can be rebuilt from the segment
+        return self.start + 1 + len(self.deltas)
+
+
+class HistoryRecorder:
+    def __init__(self, budget: int = 64 * 2 ** 20, keyframe_interval: int = 64, policy: str = "oldest",
+                 states: int = 2, level: int = 1):
+        """
+        Records generations as compressed keyframes every keyframe_interval generations, with the zlib compressed
+        XOR of every generation against the one before it in between. Most cells don't change between
+        generations, so deltas compress to a small fraction of a grid.
+
+        Seeking rebuilds a generation from its keyframe and at most keyframe_interval deltas, and playing forward
+        reuses the last generation rebuilt, so each step of playback applies a single delta.
+
+        :param budget: bytes of compressed history kept before evicting.
+        :param keyframe_interval: generations between keyframes.
+        :param policy: "oldest" evicts the oldest generations first. "keyframes" first drops the deltas of the
+            oldest segments, keeping their keyframes for coarse scrubbing, then evicts the oldest keyframes.
+        :param states: cell states of the boards, two state boards are bit-packed before compression.
+        :param level: zlib compression level.
+        """
+        if policy not in eviction_policies:
+            raise ValueError(f"policy must be one of {', '.join(eviction_policies)}")
+
+        self.budget = budget
+        self.keyframe_interval = keyframe_interval
+        self.policy = policy
+        self.states = states
+        self.level = level
+
+        self.nbytes = 0
+        self.shape = None
+
+        self._segments = []
+        self._starts = []
+        self._previous = None
+        # the last rebuilt generation, as (segment, iteration, encoded state)
+        self._cache = None
+
+    def reset(self):
+        self.nbytes = 0
+        self.shape = None
+        self._segments.clear()
+        self._starts.clear()
+        self._previous = None
+        self._cache = None
+
+    @property
+    def first(self):
+        return self._segments[0].start if self._segments else None
+
+    @property
+    def last(self):
+        return self._segments[-1].stop - 1 if self._segments else None
+
+    def __contains__(self, iteration: int) -> bool:
+        index = bisect.bisect_right(self._starts, iteration) - 1
+        return index >= 0 and iteration < self._segments[index].stop
+
+    def _encode(self, grid: np.ndarray) -> np.ndarray:
+        if self.states == 2:
+            return np.packbits(grid != 0)
+        return grid.astype(np.uint8).ravel()
+
+    def _decode(self, state: np.ndarray) -> np.ndarray:
+        if self.states == 2:
+            return np.unpackbits(state, count=self.shape[0] * self.shape[1]).reshape(self.shape)
+        return state.reshape(self.shape).copy()
+
+    def record(self, grid: np.ndarray, iteration: int, population: int = None):
+        """
+        Record the grid at the given iteration. Recording anything other than the generation after the last one
+        starts a new keyframe, and going back to an earlier generation or changing shape clears the history.
+        """
+        grid = np.asarray(grid)
+        if population is None:
+            population = int(np.count_nonzero(grid == 1))
+
+        if self.shape != grid.shape or (self._segments and iteration <= self.last):
+            self.reset()
+            self.shape = grid.shape
+
+        state = self._encode(grid)
+        segment = self._segments[-1] if self._segments else None
+
+        if segment is None or iteration != segment.stop or segment.stop - segment.start >= self.keyframe_interval:
+            segment = _Segment(iteration, zlib.compress(state.tobytes(), self.level), population)
+            self._segments.append(segment)
+            self._starts.append(iteration)
+            self.nbytes += segment.nbytes
+        else:
+            delta = zlib.compress(np.bitwise_xor(state, self._previous).tobytes(), self.level)
+            segment.deltas.append(delta)
+            segment.populations.append(population)
+            segment.nbytes += len(delta)
+            self.nbytes += len(delta)
+
+        self._previous = state
+        self._evict()
+
+    def _evict(self):
+        # the segment being recorded into is never evicted
+        if self.policy == "keyframes":
+            for segment in self._segments[:-1]:
+                if self.nbytes <= self.budget:
+                    return
+                if segment.deltas:
+                    self._drop_deltas(segment)
+
+        while self.nbytes > self.budget and len(self._segments) > 1:
+            segment = self._segments.pop(0)
+            self._starts.pop(0)
+            self.nbytes -= segment.nbytes
+            if self._cache is not None and self._cache[0] is segment:
+                self._cache = None
+
+    def _drop_deltas(self, segment: _Segment):
+        freed = sum(len(delta) for delta in segment.deltas)
+        segment.deltas = []
+        segment.populations = segment.populations[:1]
+        segment.nbytes -= freed
+        self.nbytes -= freed
+
+        if self._cache is not None and self._cache[0] is segment:
+            self._cache = None
+
+    def seek(self, iteration: int) -> Frame:
+        """
+        Rebuild a recorded generation.
+
+        :return: Frame of the generation, with a grid owned by the caller.
+        :raises KeyError: if the generation was never recorded or has been evicted.
+        """
+        index = bisect.bisect_right(self._starts, iteration) - 1
+        if index < 0 or iteration >= self._segments[index].stop:
+            raise KeyError(f"generation {iteration} is not in the history")
+
+        segment = self._segments[index]
+        if self._cache is not None and self._cache[0] is segment and self._cache[1] <= iteration:
+            _, current, state = self._cache
+        else:
+            current = segment.start
+            state = np.frombuffer(zlib.decompress(segment.keyframe), dtype=np.uint8).copy()
+
+        for delta in segment.deltas[current - segment.start: iteration - segment.start]:
+            np.bitwise_xor(state, np.frombuffer(zlib.decompress(delta), dtype=np.uint8), out=state)
+
+        self._cache = (segment, iteration, state)
+        return Frame(self._decode(state), iteration, segment.populations[iteration - segment.start])
+
+    def play(self, start: int = None, stop: int = None, step: int = 1):
+        """
+        Yield the Frames of recorded generations from start up to stop, skipping generations that have been
+        evicted.
+        """
+        if not self._segments:
+            return
+
+        start = self.first if start is None else start
+        stop = self.last + 1 if stop is None else stop
+
+        for iteration in range(start, stop, step):
+            if iteration in self:
+                yield self.seek(iteration)
@@ -0,0 +1,120 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from engine import LifeEngine, count_neighbours, live_bounds
+
+
+class ParallelLifeEngine(LifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None, workers: int = None):
+        """
+        Multi-core engine splitting the grid into horizontal bands, one per worker. Every band reads its rows
+        plus a one row halo from the shared front buffer and writes into the shared back buffer, so the halo
+        exchange is just reading the neighbouring band's edge rows. NumPy releases the GIL inside its ufuncs,
+        so a thread pool runs the bands on separate cores without copying the grid between processes.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state, copied into the engine.
+        :param workers: number of bands and threads, defaults to the number of CPUs.
+        """
+        rows, cols = int(shape[0]), int(shape[1])
+        self.workers = max(1, min(workers or os.cpu_count() or 1, rows))
+
+        edges = np.linspace(0, rows, self.workers + 1).astype(int)
+        self.bands = list(zip(edges[:-1], edges[1:]))
+
+        self._back = np.zeros((rows, cols), dtype=np.uint8)
+        # neighbour buffer for every band, sized to include its halo rows
+        self._neighbours = [np.zeros((min(stop + 1, rows) - max(start - 1, 0), cols), dtype=np.uint8)
+                            for start, stop in self.bands]
+        # population, changed cells and bounding box of every band from the last generation
+        self._band_stats = [(0, 0, None)] * self.workers
+        self._window = None
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        super().__init__(shape, grid)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def _step_band(self, band: int):
+        start, stop = self.bands[band]
+        halo_start = max(start - 1, 0)
+
+        neighbours = count_neighbours(self._grid[halo_start: stop + 1], out=self._neighbours[band])
+        neighbours = neighbours[start - halo_start: stop - halo_start]
+
+        np.bitwise_or(neighbours, self._grid[start: stop], out=neighbours)
+        np.equal(neighbours, 3, out=self._back[start: stop].view(bool))
+
+        # stats only need the band's rows inside the search window. The band's neighbour counts are used up, so
+        # their buffer holds the changed cells
+        window = self._window
+        if window is None or max(start, window[0]) >= min(stop, window[1]):
+            self._band_stats[band] = (0, 0, None)
+            return
+
+        r0, r1, c0, c1 = max(start, window[0]), min(stop, window[1]), window[2], window[3]
+        new = self._back[r0: r1, c0: c1]
+        changed = np.bitwise_xor(self._grid[r0: r1, c0: c1], new, out=neighbours[r0 - start: r1 - start, c0: c1])
+        self._band_stats[band] = (int(np.count_nonzero(new)), int(np.count_nonzero(changed)),
+                                  live_bounds(new, c0, r0))
+
+    def _step(self):
+        self._window = self._search_window()
+
+        # every band must finish reading the front buffer before the buffers are swapped
+        list(self._pool.map(self._step_band, range(self.workers)))
+
+        self._grid, self._back = self._back, self._grid
+
+        parts = [stats[2] for stats in self._band_stats if stats[2] is not None]
+        bounds = None
+        if parts:
+            x0, y0 = min(part[0] for part in parts), min(part[1] for part in parts)
+            x1, y1 = max(part[0] + part[2] for part in parts), max(part[1] + part[3] for part in parts)
+            bounds = (x0, y0, x1 - x0, y1 - y0)
+
+        self._set_counts(sum(stats[0] for stats in self._band_stats), sum(stats[1] for stats in self._band_stats),
+                         bounds)
+
+
+def scaling_report(shape=(10000, 10000), worker_counts=None, generations: int = 10, density: float = 0.3):
+    """
+    Time ParallelLifeEngine on a random board for each worker count.
+
+    :return: list of (workers, seconds per generation, speedup, efficiency) tuples, relative to the first worker
+        count.
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    grid = (np.random.default_rng(0).random(shape) < density).astype(np.uint8)
+
+    report = []
+    baseline = None
+    for workers in worker_counts:
+        engine = ParallelLifeEngine(shape, grid, workers=workers)
+        engine.step()
+
+        start = time.perf_counter()
+        engine.step(generations)
+        per_generation = (time.perf_counter() - start) / generations
+        engine.close()
+
+        if baseline is None:
+            baseline = (workers, per_generation)
+
+        speedup = baseline[1] / per_generation
+        report.append((workers, per_generation, speedup, speedup * baseline[0] / workers))
+
+    return report
+
+
+if __name__ == "__main__":
+    for workers, per_generation, speedup, efficiency in scaling_report():
+        print(f"{workers:>3} workers: {per_generation * 1000:8.1f} ms/gen, "
+              f"speedup {speedup:5.2f}, efficiency {efficiency:6.1%}")
@@ -0,0 +1,267 @@
+import re
+from pathlib import Path
+
+import numpy as np
+
+from Patterns import patterns
+from hashlife import HashLifeEngine
+
+_WHITESPACE = np.frombuffer(b" \t\r\n", dtype=np.uint8)
+_POWERS = 10.0 ** np.arange(20)
+
+
+def _read_bytes(source) -> bytes:
+    if hasattr(source, "read"):
+        data = source.read()
+        return data.encode() if isinstance(data, str) else data
+
+    with open(source, "rb") as file:
+        return file.read()
+
+
+def _fill_runs(rows: np.ndarray, starts: np.ndarray, lengths: np.ndarray, shape) -> np.ndarray:
+    """
+    Dense uint8 grid with the horizontal runs of live cells set, written through a difference array so the cost
+    is one pass over the grid whatever the number of runs.
+    """
+    height, width = shape
+    flat = rows.astype(np.int64) * width + starts
+
+    # runs never overlap, so starts are unique and so are ends
+    diff = np.zeros(height * width + 1, dtype=np.int8)
+    diff[flat] += 1
+    diff[flat + lengths] -= 1
+
+    return np.cumsum(diff[:-1], dtype=np.int8).view(np.uint8).reshape(shape)
+
+
+def read_rle(source) -> np.ndarray:
+    """
+    Decode a run length encoded pattern. The body is decoded as one numpy array of bytes, so no Python object is
+    made per run and multi-megabyte files load in a fraction of a second.
+
+    :param source: path or binary file object.
+    :return: uint8 grid of the pattern, at least the size given in the header.
+    """
+    data = _read_bytes(source)
+
+    # comment lines and the header come first, the body runs from there to the terminating !
+    width = height = 0
+    offset = 0
+    while offset < len(data):
+        end = data.find(b"\n", offset)
+        end = len(data) if end < 0 else end + 1
+        line = data[offset: end].strip()
+        if line and not line.startswith(b"#"):
+            header = re.match(rb"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)", line)
+            if header is not None:
+                width, height = int(header.group(1)), int(header.group(2))
+                offset = end
+            break
+        offset = end
+
+    body = np.frombuffer(data, dtype=np.uint8, offset=offset)
+    stop = np.flatnonzero(body == ord("!"))
+    if stop.size:
+        body = body[:stop[0]]
+    body = body[~np.isin(body, _WHITESPACE)]
+
+    is_digit = (body >= ord("0")) & (body <= ord("9"))
+    tag_positions = np.flatnonzero(~is_digit)
+    tags = body[tag_positions]
+
+    # run counts: every digit is weighted by its distance to the tag that follows it, a tag without digits is 1
+    digit_positions = np.flatnonzero(is_digit)
+    owner = np.cumsum(~is_digit)[digit_positions]
+    if owner.size and owner[-1] >= tags.size:
+        raise ValueError("run count without a tag at the end of the pattern")
+
+    exponents = tag_positions[owner] - digit_positions - 1
+    values = (body[digit_positions] - ord("0")) * _POWERS[exponents]
+    counts = np.bincount(owner, weights=values, minlength=tags.size).astype(np.int64)
+    counts[np.bincount(owner, minlength=tags.size) == 0] = 1
+
+    # $ ends as many rows as its count, b and . are dead runs and any other tag is a live run
+    newline = tags == ord("$")
+    advance = np.where(newline, 0, counts)
+    before = np.cumsum(advance) - advance
+    rows = np.cumsum(np.where(newline, counts, 0)) - np.where(newline, counts, 0)
+    columns = before - np.maximum.accumulate(np.where(newline, before, 0))
+
+    live = ~newline & (tags != ord("b")) & (tags != ord("."))
+    rows, columns, lengths = rows[live], columns[live], counts[live]
+
+    if lengths.size:
+        width = max(width, int((columns + lengths).max()))
+        height = max(height, int(rows.max()) + 1)
+
+    return _fill_runs(rows, columns, lengths, (height, width))
+
+
+def read_cells(source) -> np.ndarray:
+    """
+    Decode a plaintext .cells pattern, where ! starts a comment line, O or * is a live cell and . a dead one.
+
+    :param source: path or binary file object.
+    :return: uint8 grid of the pattern.
+    """
+    text = np.frombuffer(_read_bytes(source), dtype=np.uint8)
+
+    newlines = np.flatnonzero(text == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [text.size]))
+    if starts[-1] == text.size:
+        starts, ends = starts[:-1], ends[:-1]
+
+    kept = np.ones(starts.size, dtype=bool)
+    nonempty = starts < ends
+    kept[nonempty] = text[starts[nonempty]] != ord("!")
+    row_of_line = np.cumsum(kept) - 1
+
+    lengths = ends - starts - (text[np.maximum(ends - 1, 0)] == ord("\r"))
+    height = int(kept.sum())
+    width = int(lengths[kept].max()) if height else 0
+
+    alive = np.flatnonzero((text == ord("O")) | (text == ord("*")))
+    line = np.searchsorted(newlines, alive)
+    alive, line = alive[kept[line]], line[kept[line]]
+
+    grid = np.zeros((height, width), dtype=np.uint8)
+    grid[row_of_line[line], alive - starts[line]] = 1
+    return grid
+
+
+def read_macrocell(source) -> np.ndarray:
+    """
+    Decode a Macrocell .mc quadtree, streaming it one node per line. Leaves are 8x8 blocks and every other node
+    refers back to four earlier nodes, so shared subtrees are decoded once and only stamped where they are used.
+
+    :param source: path or binary file object.
+    :return: uint8 grid covering the live cells of the pattern.
+    """
+    nodes, bounds = _macrocell_nodes(source)
+    if len(nodes) == 1 or bounds[-1] is None:
+        return np.zeros((0, 0), dtype=np.uint8)
+
+    left, top, right, bottom = bounds[-1]
+    grid = np.zeros((bottom - top, right - left), dtype=np.uint8)
+
+    # stamp every non-empty leaf, walking down from the root with the offset of each node in the grid
+    stack = [(len(nodes) - 1, -left, -top)]
+    while stack:
+        index, x, y = stack.pop()
+        node = nodes[index]
+        if isinstance(node, np.ndarray):
+            x0, y0, x1, y1 = bounds[index]
+            grid[y + y0: y + y1, x + x0: x + x1] |= node[y0: y1, x0: x1]
+            continue
+
+        half = 1 << (node[0] - 1)
+        for child, dx, dy in zip(node[1:], (0, half, 0, half), (0, 0, half, half)):
+            if child and bounds[child] is not None:
+                stack.append((child, x + dx, y + dy))
+
+    return grid
+
+
+def add_macrocell(engine, source, x: int = 0, y: int = 0):
+    """
+    Add a Macrocell .mc pattern to an engine with the top left corner of its live cells at column x, row y. A
+    HashLifeEngine gets the quadtree as its own canonical nodes, so shared subtrees stay shared and the pattern is
+    never expanded to a dense grid. Other engines add the grid from read_macrocell.
+
+    :param engine: engine to add the pattern to.
+    :param source: path or binary file object.
+    """
+    if not isinstance(engine, HashLifeEngine):
+        engine.add_pattern(read_macrocell(source), x, y)
+        return
+
+    nodes, bounds = _macrocell_nodes(source)
+    if len(nodes) == 1 or bounds[-1] is None:
+        return
+
+    built = [None]
+    for node in nodes[1:]:
+        if isinstance(node, np.ndarray):
+            built.append(engine.leaf(node))
+        else:
+            level, *children = node
+            built.append(engine.join(*(built[child] if child else engine.empty(level - 1) for child in children)))
+
+    left, top = bounds[-1][:2]
+    engine.add_node(built[-1], int(x) - left, int(y) - top)
+
+
+def _macrocell_nodes(source):
+    if hasattr(source, "read"):
+        return _read_macrocell_lines(source)
+
+    with open(source, "rb") as file:
+        return _read_macrocell_lines(file)
+
+
+def _read_macrocell_lines(lines):
+    # node i (1 based, 0 is the empty node) as a leaf bitmap or a (level, nw, ne, sw, se) tuple, with the
+    # (left, top, right, bottom) of its live cells or None
+    nodes, bounds = [None], [None]
+
+    for line in lines:
+        line = line.strip()
+        if isinstance(line, str):
+            line = line.encode()
+        if not line or line[:1] in (b"[", b"#"):
+            continue
+
+        if line[:1] in (b".", b"*", b"$"):
+            leaf = np.zeros((8, 8), dtype=np.uint8)
+            for row, cells in enumerate(line.split(b"$")[:8]):
+                if cells:
+                    leaf[row, :len(cells)] = np.frombuffer(cells[:8], dtype=np.uint8) == ord("*")
+
+            live_rows, live_cols = np.flatnonzero(leaf.any(axis=1)), np.flatnonzero(leaf.any(axis=0))
+            nodes.append(leaf)
+            bounds.append((int(live_cols[0]), int(live_rows[0]), int(live_cols[-1]) + 1, int(live_rows[-1]) + 1)
+                          if live_rows.size else None)
+            continue
+
+        level, *children = (int(value) for value in line.split())
+        if level <= 3 or len(children) != 4:
+            raise ValueError(f"unsupported macrocell node {line.decode(errors='replace')!r}")
+
+        half = 1 << (level - 1)
+        parts = [(bounds[child][0] + dx, bounds[child][1] + dy, bounds[child][2] + dx, bounds[child][3] + dy)
+                 for child, dx, dy in zip(children, (0, half, 0, half), (0, 0, half, half))
+                 if child and bounds[child] is not None]
+
+        nodes.append((level, *children))
+        bounds.append((min(part[0] for part in parts), min(part[1] for part in parts),
+                       max(part[2] for part in parts), max(part[3] for part in parts)) if parts else None)
+
+    return nodes, bounds
+
+
+readers = {".rle": read_rle, ".cells": read_cells, ".mc": read_macrocell}
+
+
+def register_pattern(category: str, name: str, grid: np.ndarray):
+    patterns.setdefault(category, {})[name] = grid
+
+
+def load_pattern(path, category: str = "imported", name: str = None) -> np.ndarray:
+    """
+    Read a pattern file with the reader for its extension and register it in patterns.
+
+    :param path: .rle, .cells or .mc file.
+    :param category: category to register the pattern under.
+    :param name: name to register the pattern under, the file name without its extension by default.
+    :return: the decoded grid.
+    """
+    path = Path(path)
+    reader = readers.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"no reader for {path.suffix!r} files, expected one of {', '.join(readers)}")
+
+    grid = reader(path)
+    register_pattern(category, name or path.stem, grid)
+    return grid
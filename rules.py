@@ -0,0 +1,243 @@
+import re
+
+import numpy as np
+
+from engine import LifeEngine, count_neighbours, live_bounds
+
+# well known rules by name, any of these can be passed wherever a rulestring is accepted
+named_rules = {"life": "B3/S23", "highlife": "B36/S23", "day_and_night": "B3678/S34678", "seeds": "B2/S",
+               "life_without_death": "B3/S012345678", "brians_brain": "B2/S/C3", "star_wars": "B2/S345/C4",
+               "bosco": "R5,C0,M1,S34..58,B34..45,NM"}
+
+
+def box_sum(alive: np.ndarray, radius: int, summed: np.ndarray = None) -> np.ndarray:
+    """
+    Sum of every (2 * radius + 1) square box of cells, centre included, from an integral image. The cost is the
+    same for any radius. Cells beyond the edge of the grid are treated as dead.
+
+    :param alive: (rows, cols) array of 0/1 cells.
+    :param radius: reach of the box from its centre.
+    :param summed: optional preallocated int32 array of shape (rows + 2 * radius + 1, cols + 2 * radius + 1).
+    :return: int32 array of box sums with the shape of alive.
+    """
+    rows, cols = alive.shape
+    size = 2 * radius + 1
+    if summed is None:
+        summed = np.zeros((rows + size, cols + size), dtype=np.int32)
+    else:
+        summed.fill(0)
+
+    # summed[i, j] holds the total of every cell above and left of it, inclusive, after the two cumulative sums
+    summed[radius + 1: radius + 1 + rows, radius + 1: radius + 1 + cols] = alive
+    np.cumsum(summed, axis=0, out=summed)
+    np.cumsum(summed, axis=1, out=summed)
+
+    return (summed[size:, size:] - summed[:rows, size:]) - (summed[size:, :cols] - summed[:rows, :cols])
+
+
+class Rule:
+    def __init__(self, rulestring: str):
+        """
+        Life-like, Generations or Larger than Life rule parsed from a rulestring and compiled into a lookup table
+        of next state by (state, neighbour count).
+
+        Accepted forms are B/S notation ("B36/S23"), S/B notation ("23/36"), Generations with a state count
+        ("B2/S/C3" or "/2/3") and Larger than Life ("R5,C0,M1,S34..58,B34..45,NM"). Keys of named_rules are
+        accepted too.
+
+        :param rulestring: the rule to parse.
+        """
+        text = named_rules.get(rulestring.strip().lower(), rulestring).strip()
+
+        if text[:1].upper() == "R":
+            self.radius, self.states, self.middle, self.birth, self.survival = self._parse_ltl(text)
+        else:
+            self.radius, self.middle = 1, False
+            self.birth, self.survival, self.states = self._parse_life_like(text)
+
+        if self.states > 256:
+            raise ValueError(f"at most 256 states are supported, got {self.states}")
+
+        self.max_count = (2 * self.radius + 1) ** 2
+        self.table = self._compile()
+
+    @staticmethod
+    def _parse_life_like(text: str):
+        parts = text.split("/")
+        if not 2 <= len(parts) <= 3:
+            raise ValueError(f"invalid rulestring {text!r}")
+
+        tagged = {part[:1].upper(): part[1:] for part in parts if part[:1].isalpha()}
+        if tagged:
+            if set(tagged) - {"B", "S", "C", "G"} or len(tagged) != len(parts):
+                raise ValueError(f"invalid rulestring {text!r}")
+            birth, survival = tagged.get("B", ""), tagged.get("S", "")
+            states = tagged.get("C", tagged.get("G", "2"))
+        else:
+            # untagged rulestrings list survival first
+            survival, birth = parts[0], parts[1]
+            states = parts[2] if len(parts) == 3 else "2"
+
+        if not (birth + survival).isdigit() and (birth or survival) or "9" in birth + survival:
+            raise ValueError(f"invalid rulestring {text!r}")
+        if not states.isdigit() or int(states) < 2:
+            raise ValueError(f"invalid state count in {text!r}")
+
+        return {int(digit) for digit in birth}, {int(digit) for digit in survival}, int(states)
+
+    @staticmethod
+    def _parse_ltl(text: str):
+        # comma separated keys, a bare number or range after S or B adds to the same set
+        values, key = {}, None
+        for token in text.replace(" ", "").upper().split(","):
+            match = re.fullmatch(r"([A-Z]*)(\d*)(?:(?:\.\.|-)(\d+))?", token)
+            if match is None or not (match.group(1) or key in ("S", "B")):
+                raise ValueError(f"invalid rulestring {text!r}")
+
+            if match.group(1):
+                key = match.group(1)
+                values.setdefault(key, set())
+            if match.group(2):
+                low = int(match.group(2))
+                high = int(match.group(3)) if match.group(3) else low
+                values[key].update(range(low, high + 1))
+
+        unknown = values.keys() - {"R", "C", "M", "S", "B", "NM"}
+        if unknown:
+            raise ValueError(f"unsupported {', '.join(sorted(unknown))} in {text!r}, only the Moore neighbourhood "
+                             f"(NM) is supported")
+
+        def single(key, default):
+            found = values.get(key)
+            if not found:
+                return default
+            if len(found) != 1:
+                raise ValueError(f"{key} takes a single value in {text!r}")
+            return next(iter(found))
+
+        radius = single("R", None)
+        if not radius:
+            raise ValueError(f"missing radius in {text!r}")
+        states = max(single("C", 0), 2)
+        middle = bool(single("M", 0))
+
+        return radius, states, middle, values.get("B", set()), values.get("S", set())
+
+    def _compile(self) -> np.ndarray:
+        counts = np.arange(self.max_count + 1)
+        table = np.zeros((self.states, self.max_count + 1), dtype=np.uint8)
+
+        table[0] = np.isin(counts, list(self.birth))
+        # live cells that don't survive start dying, or die straight away with two states
+        table[1] = np.where(np.isin(counts, list(self.survival)), 1, 2 % self.states)
+        for state in range(2, self.states):
+            table[state] = (state + 1) % self.states
+
+        return table
+
+    def __str__(self):
+        def ranges(values):
+            return ",".join(f"{low}..{high}" if high > low else f"{low}" for low, high in _runs(sorted(values)))
+
+        # B/S notation can't express counting the middle cell
+        if self.radius > 1 or self.middle:
+            return (f"R{self.radius},C{self.states if self.states > 2 else 0},M{int(self.middle)},"
+                    f"S{ranges(self.survival)},B{ranges(self.birth)},NM")
+
+        text = f"B{''.join(map(str, sorted(self.birth)))}/S{''.join(map(str, sorted(self.survival)))}"
+        return text if self.states == 2 else f"{text}/C{self.states}"
+
+    def __repr__(self):
+        return f"Rule({str(self)!r})"
+
+    def count(self, alive: np.ndarray, out: np.ndarray = None, summed: np.ndarray = None) -> np.ndarray:
+        """
+        Neighbour count of every cell, the cell itself included when the rule counts the middle.
+
+        :param out: optional preallocated uint8 array, only used by radius one rules.
+        :param summed: optional preallocated integral image, only used by larger radii.
+        """
+        if self.radius == 1:
+            counts = count_neighbours(alive, out=out)
+            if self.middle:
+                counts += alive
+            return counts
+
+        counts = box_sum(alive, self.radius, summed)
+        if not self.middle:
+            counts -= alive
+        return counts
+
+    def apply(self, states: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Next state of every cell from its current state and neighbour count.
+        """
+        return self.table[states, counts]
+
+
+def _runs(values):
+    # consecutive integers grouped into (low, high) pairs
+    runs = []
+    for value in values:
+        if runs and runs[-1][1] == value - 1:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    return runs
+
+
+class RuleEngine(LifeEngine):
+    def __init__(self, shape, grid: np.ndarray = None, rule="B3/S23"):
+        """
+        Engine running any Rule. Radius one rules count neighbours with shifted adds, larger radii with an
+        integral image, and the next state comes from the rule's lookup table. In Generations rules only state 1
+        is alive, states 2 and up are dying cells that count towards neither neighbours nor population.
+
+        :param shape: (rows, cols) of the grid.
+        :param grid: optional starting state of cell states, copied into the engine.
+        :param rule: a Rule, a rulestring or a key of named_rules.
+        """
+        self.rule = rule if isinstance(rule, Rule) else Rule(rule)
+
+        shape = tuple(int(size) for size in shape)
+        self._alive = np.zeros(shape, dtype=np.uint8)
+        self._next_alive = np.zeros(shape, dtype=np.uint8)
+        self._counts = np.zeros(shape, dtype=np.uint8)
+        self._summed = None
+        if self.rule.radius > 1:
+            size = 2 * self.rule.radius + 1
+            self._summed = np.zeros((shape[0] + size, shape[1] + size), dtype=np.int32)
+
+        super().__init__(shape, grid)
+
+    def _set_grid(self, grid: np.ndarray):
+        if grid.size and (grid.min() < 0 or grid.max() >= self.rule.states):
+            raise ValueError(f"cell states must lie in [0, {self.rule.states})")
+
+        self._grid = grid.astype(np.uint8)
+
+    def count_population(self) -> int:
+        return int(np.count_nonzero(self._grid == 1))
+
+    def _find_bounds(self):
+        return live_bounds(self._grid == 1)
+
+    def _search_window(self, margin: int = 1):
+        # B0 rules bring cells to life anywhere, otherwise live cells spread by the radius each generation
+        if 0 in self.rule.birth:
+            return 0, self.shape[0], 0, self.shape[1]
+        return super()._search_window(self.rule.radius)
+
+    def _step(self):
+        old = self._grid
+        np.equal(old, 1, out=self._alive.view(bool))
+
+        counts = self.rule.count(self._alive, out=self._counts, summed=self._summed)
+
+        new = self.rule.apply(old, counts)
+
+        # births and deaths are of state 1. The neighbour counts are used up, so their buffer holds the changed
+        # cells, and the search window comes from the old grid's bounds so the new grid is swapped in after
+        np.equal(new, 1, out=self._next_alive.view(bool))
+        self._record_step(self._alive, self._next_alive, changed=self._counts)
+        self._grid = new
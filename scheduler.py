@@ -0,0 +1,116 @@
+import math
+import time
+
+
+class FrameScheduler:
+    def __init__(self, speed: float = 100, frame_rate: float = 60, frame_budget: float = None,
+                 render_every: int = None):
+        """
+        Decides how many generations to simulate and when to render, so the simulation rate is independent of
+        the render rate.
+
+        :param speed: target generations per second, or None to simulate as fast as the frame budget allows.
+        :param frame_rate: maximum number of rendered frames per second.
+        :param frame_budget: seconds of simulation allowed per frame. If None the budget adapts to whatever is
+            left of the frame after rendering.
+        :param render_every: turbo mode, only render once at least this many generations have passed.
+        """
+        self.speed = speed
+        self.frame_rate = frame_rate
+        self.frame_budget = frame_budget
+        self.render_every = render_every
+
+        # running estimates, in seconds, of the cost of one generation and of one rendered frame
+        self.generation_time = 1e-3
+        self.render_time = 0.0
+
+        self._owed = 0.0
+        self._last_tick = None
+        self._last_frame = None
+        self._unrendered = 0
+
+    def start(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        self._owed = 0.0
+        self._last_tick = now
+        self._last_frame = now
+        self._unrendered = 0
+
+    @property
+    def budget(self) -> float:
+        if self.frame_budget is not None:
+            return self.frame_budget
+        return max(1 / self.frame_rate - self.render_time, 0.2 / self.frame_rate)
+
+    def next_deadline(self, now: float = None, background: bool = False) -> float:
+        """
+        Time at which the next frame should be processed: once the frame interval has passed and at least one
+        generation is owed. Without a target speed, or when a background worker does the stepping, only the frame
+        interval is waited for.
+
+        :param background: generations are stepped by a background worker rather than when frames are processed.
+        """
+        now = time.monotonic() if now is None else now
+        if self._last_frame is None:
+            return now
+
+        if self.speed is None or background:
+            # the next frame boundary still ahead, so nothing spins while waiting for the worker to publish
+            frames = math.floor((now - self._last_frame) * self.frame_rate) + 1
+            return self._last_frame + max(frames, 1) / self.frame_rate
+
+        next_generation = self._last_tick + max(1 - self._owed, 0.0) / self.speed
+        return max(self._last_frame + 1 / self.frame_rate, next_generation)
+
+    def generations_due(self, now: float = None) -> int:
+        """
+        Number of generations to simulate before the next frame.
+        """
+        now = time.monotonic() if now is None else now
+        if self._last_tick is None:
+            self.start(now)
+
+        affordable = max(1, int(self.budget / self.generation_time))
+
+        if self.speed is None:
+            self._last_tick = now
+            return affordable
+
+        self._owed += (now - self._last_tick) * self.speed
+        self._last_tick = now
+
+        generations = min(int(self._owed), affordable)
+        self._owed -= generations
+        # don't build up a backlog that can never be caught up with
+        self._owed = min(self._owed, float(affordable))
+
+        return generations
+
+    def record_generations(self, generations: int, elapsed: float = None):
+        """
+        Record generations simulated since the last frame. elapsed is left out when the generations were
+        simulated elsewhere, for example by a background worker, so they don't count towards the budget.
+        """
+        if generations:
+            if elapsed is not None:
+                self.generation_time = 0.8 * self.generation_time + 0.2 * elapsed / generations
+            self._unrendered += generations
+
+    def record_render(self, elapsed: float):
+        self.render_time = 0.8 * self.render_time + 0.2 * elapsed
+
+    def frame_due(self, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self._last_frame is None:
+            self.start(now)
+
+        if not self._unrendered:
+            return False
+        if self.render_every and self._unrendered < self.render_every:
+            return False
+        if now - self._last_frame < 1 / self.frame_rate:
+            return False
+
+        self._last_frame = now
+        self._unrendered = 0
+        return True
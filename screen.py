@@ -1,4 +1,6 @@
 import math
+import re
+from collections import OrderedDict
 from enum import Enum
 
 import pygame as pg
@@ -45,15 +47,153 @@ class BlitPosition(Enum):
     centre = 8
 
 
+class LRUCache:
+    def __init__(self, limit: int):
+        """
+        Dict with a bounded number of entries, evicting the least recently used one once full.
+        """
+        self.limit = limit
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.limit:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+# a label followed by a number, such as the iteration and population counters
+_COUNTER = re.compile(r"(.*?)(-?\d+)")
+
+
+class TextCache:
+    def __init__(self, limit: int = 512, layout_limit: int = 64):
+        """
+        Rendered text surfaces, text widths and multiline layouts shared by every screen. Surfaces handed out
+        are shared, so they must only ever be blitted from. Text ending in a counter is drawn into canvases kept
+        per label and size, which are redrawn in place when the number changes, so counters don't allocate a
+        surface per frame.
+
+        :param limit: number of rendered strings and of measured widths kept.
+        :param layout_limit: number of composed multiline blocks kept, and of counter canvases.
+        """
+        self.surfaces = LRUCache(limit)
+        self.sizes = LRUCache(limit)
+        self.layouts = LRUCache(layout_limit)
+        self.canvases = LRUCache(layout_limit)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sizes.clear()
+        self.layouts.clear()
+        self.canvases.clear()
+
+    def canvas(self, key, size) -> pg.Surface:
+        """
+        Reusable transparent surface for text that changes every frame, cleared for redrawing. Only valid until
+        the next call with the same key.
+        """
+        key = (key, tuple(size))
+        surface = self.canvases.get(key)
+        if surface is None:
+            surface = self.canvases.put(key, pg.Surface(size, pg.SRCALPHA))
+        else:
+            surface.fill((0, 0, 0, 0))
+        return surface
+
+    def render(self, font: pg.font.Font, text: str, colour) -> pg.Surface:
+        key = (font, text, tuple(colour))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces.put(key, font.render(text, True, colour))
+        return surface
+
+    def size(self, font: pg.font.Font, text: str):
+        key = (font, text)
+        size = self.sizes.get(key)
+        if size is None:
+            size = self.sizes.put(key, font.size(text))
+        return size
+
+    def render_line(self, font: pg.font.Font, text: str, colour) -> pg.Surface:
+        """
+        Render a line of text. Lines ending in a number are put together from the cached label and cached digits
+        in a reused canvas, so a counter that changes every frame never goes through the font renderer.
+        """
+        match = _COUNTER.fullmatch(text)
+        if match is None:
+            return self.render(font, text, colour)
+
+        label, number = match.groups()
+        parts = [self.render(font, label, colour)] if label else []
+        parts.extend(self.render(font, digit, colour) for digit in number)
+
+        size = (sum(part.get_width() for part in parts), max(part.get_height() for part in parts))
+        surface = self.canvas(("line", font, label, tuple(colour)), size)
+        x = 0
+        for part in parts:
+            surface.blit(part, (x, 0))
+            x += part.get_width()
+        return surface
+
+
+text_cache = TextCache()
+
+
+font_path = "fonts/calibri-regular.ttf"
+
+# fonts opened so far by size, shared by every screen so each size is only read from disk once
+_loaded_fonts = {}
+
+
+def load_font(size: int) -> pg.font.Font:
+    font = _loaded_fonts.get(size)
+    if font is None:
+        font = _loaded_fonts[size] = pg.font.Font(font_path, size)
+    return font
+
+
 class Fonts:
     def __init__(self):
-        self.large = pg.font.Font("fonts/calibri-regular.ttf", 50)
-        self.normal = pg.font.Font("fonts/calibri-regular.ttf", 30)
-        self.small = pg.font.Font("fonts/calibri-regular.ttf", 15)
-        self.custom = self.normal
+        """
+        Font sizes used by the screens. Nothing is loaded until a font is first used.
+        """
+        self.custom_size = 30
+
+    @property
+    def large(self) -> pg.font.Font:
+        return load_font(50)
+
+    @property
+    def normal(self) -> pg.font.Font:
+        return load_font(30)
+
+    @property
+    def small(self) -> pg.font.Font:
+        return load_font(15)
+
+    @property
+    def custom(self) -> pg.font.Font:
+        return load_font(self.custom_size)
 
     def update_custom(self, size):
-        self.custom = pg.font.Font("fonts/calibri-regular.ttf", size=size)
+        self.custom_size = size
+
+
+fonts = Fonts()
 
 
 class Screen:
@@ -62,11 +202,10 @@ class Screen:
         self.base_surface = pg.Surface(size, pg.SRCALPHA)
         self.surface = pg.Surface(size, pg.SRCALPHA)
         self.sprite_surface = pg.Surface(size, pg.SRCALPHA)
+        self.fonts = fonts
         if font:
-            self.fonts = Fonts()
             self.font: pg.font.Font = font
         else:
-            self.fonts = Fonts()
             self.font = self.fonts.normal
 
         if colour:
@@ -151,7 +290,7 @@ class Screen:
     def add_text(self, text, pos, lines=1, colour=Colours.black, bg_colour=None, location=BlitLocation.topLeft, sprite=False, base=False):
         # pos will be either a tuple (x, y), or BlitPosition
 
-        text_surf = self.font.render(text, True, colour.value)
+        text_surf = text_cache.render(self.font, text, colour.value)
         if bg_colour:
             bg_surf = pg.Surface(text_surf.get_size(), pg.SRCALPHA)
             bg_surf.fill(bg_colour.value)
@@ -187,6 +326,42 @@ class Screen:
             self.fonts.update_custom(font_size)
             self.font = self.fonts.custom
 
+        # composed blocks are cached, except those holding a counter, which would only churn the cache. They are
+        # redrawn every time into a canvas kept for their label
+        layout = (self.font, tuple(rect.size), center_horizontal, center_vertical, tuple(colour.value),
+                  None if bg_colour is None else tuple(bg_colour.value), border_width)
+        counter = _COUNTER.fullmatch(text)
+        if counter is not None:
+            text_surf = self._compose_multiline_text(text, rect, center_horizontal, center_vertical, colour,
+                                                     bg_colour, border_width,
+                                                     text_cache.canvas(("block", counter.group(1)) + layout, rect.size))
+        else:
+            text_surf = text_cache.layouts.get((text,) + layout)
+            if text_surf is None:
+                text_surf = text_cache.layouts.put((text,) + layout, self._compose_multiline_text(
+                    text, rect, center_horizontal, center_vertical, colour, bg_colour, border_width))
+
+        blitPos = rect.topleft
+        size = rect.size
+
+        # pg.draw.rect(self.surface, Colours.red.value, rect, width=5)
+
+        if location == BlitLocation.centre:
+            blitPos -= size / 2
+        elif location == BlitLocation.topRight:
+            blitPos -= pg.Vector2(size.x, 0)
+        elif location == BlitLocation.midTop:
+            blitPos -= pg.Vector2(size.x / 2, 0)
+
+        elif base:
+            self.base_surface.blit(text_surf, blitPos)
+        else:
+            self.surface.blit(text_surf, blitPos)
+
+        self.font = self.fonts.normal
+
+    def _compose_multiline_text(self, text, rect, center_horizontal, center_vertical, colour, bg_colour,
+                                border_width, text_surf=None):
         ids = [0]
         line_width = 0
         for idx, word in enumerate(text.split(" ")):
@@ -194,8 +369,8 @@ class Screen:
                 ids.append(idx)
                 line_width = 0
             else:
-                width = self.font.size(word + " ")[0]
-                if line_width + self.font.size(word)[0] > rect.width - border_width*2:
+                width = text_cache.size(self.font, word + " ")[0]
+                if line_width + text_cache.size(self.font, word)[0] > rect.width - border_width*2:
                     ids.append(idx)
                     line_width = width
                 else:
@@ -206,13 +381,14 @@ class Screen:
         text_surfs = []
         for line in range(len(ids)-1):
             line_words = text.replace("\n ", "").split(" ")[ids[line]:ids[line+1]]
-            line_text_surf = self.font.render(" ".join(line_words), True, colour.value)
+            line_text_surf = text_cache.render_line(self.font, " ".join(line_words), colour.value)
 
             text_surfs.append(line_text_surf)
 
             height += line_text_surf.get_height() + gap  # cumulative height with 5px padding
 
-        text_surf = pg.Surface(rect.size, pg.SRCALPHA)
+        if text_surf is None:
+            text_surf = pg.Surface(rect.size, pg.SRCALPHA)
         if bg_colour:
             text_surf.fill(bg_colour.value)
         total_height = sum([surf.get_height() for surf in text_surfs])
@@ -228,24 +404,7 @@ class Screen:
             else:
                 text_surf.blit(surf, (border_width, y_offset + idx*(surf.get_height() + gap)))
 
-        blitPos = rect.topleft
-        size = rect.size
-
-        # pg.draw.rect(self.surface, Colours.red.value, rect, width=5)
-
-        if location == BlitLocation.centre:
-            blitPos -= size / 2
-        elif location == BlitLocation.topRight:
-            blitPos -= pg.Vector2(size.x, 0)
-        elif location == BlitLocation.midTop:
-            blitPos -= pg.Vector2(size.x / 2, 0)
-
-        elif base:
-            self.base_surface.blit(text_surf, blitPos)
-        else:
-            self.surface.blit(text_surf, blitPos)
-
-        self.font = self.fonts.normal
+        return text_surf
 
     def create_layered_shape(self, pos, shape, size, number, colours, offsets,
                              radii, offsetWidth=False, offsetHeight=False, base=False):
@@ -415,9 +574,83 @@ class GameButton(pg.sprite.Sprite):
 
 
 class GameObjects(pg.sprite.Group):
-    def __init__(self, sprites):
+    def __init__(self, sprites, bucket_size: int = 64):
+        """
+        Sprite group indexed for hit testing. Sprite rects are kept in a uniform grid of buckets, so finding the
+        sprite under a point only checks the sprites overlapping its bucket, and sprites are looked up by id
+        through a dict. Sprites that move must report it with reindex.
+
+        :param bucket_size: edge length of a bucket in pixels.
+        """
+        self.bucket_size = bucket_size
+        self._buckets = {}
+        self._cells = {}
+        # sprites of every id in insertion order, so removing one with a shared id doesn't rescan the group
+        self._by_id = {}
+        # insertion order, so overlapping sprites resolve to the earliest added like a linear scan would
+        self._order = {}
+        self._added = 0
+
         super().__init__(self, sprites)
 
+    def _rect_cells(self, rect: pg.Rect):
+        size = self.bucket_size
+        return [(x, y) for y in range(rect.top // size, (rect.bottom - 1) // size + 1)
+                for x in range(rect.left // size, (rect.right - 1) // size + 1)]
+
+    def _index(self, sprite):
+        cells = self._rect_cells(sprite.rect)
+        self._cells[sprite] = cells
+        for cell in cells:
+            self._buckets.setdefault(cell, {})[sprite] = None
+
+    def _unindex(self, sprite):
+        for cell in self._cells.pop(sprite, ()):
+            bucket = self._buckets[cell]
+            del bucket[sprite]
+            if not bucket:
+                del self._buckets[cell]
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+
+        self._order[sprite] = self._added
+        self._added += 1
+        self._by_id.setdefault(getattr(sprite, "id", None), {})[sprite] = None
+        self._index(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+
+        self._unindex(sprite)
+        del self._order[sprite]
+
+        object_id = getattr(sprite, "id", None)
+        sharing = self._by_id[object_id]
+        del sharing[sprite]
+        if not sharing:
+            del self._by_id[object_id]
+
+    def reindex(self, sprite):
+        """
+        Update the index after a sprite's rect has changed.
+        """
+        if sprite in self._order:
+            self._unindex(sprite)
+            self._index(sprite)
+
+    def get_sprite(self, object_id):
+        # earliest added sprite with the id
+        return next(iter(self._by_id.get(object_id, ())), None)
+
+    def sprite_at(self, pos):
+        """
+        Earliest added sprite whose rect contains pos, or None.
+        """
+        cell = (int(pos[0]) // self.bucket_size, int(pos[1]) // self.bucket_size)
+        hits = [sprite for sprite in self._buckets.get(cell, ()) if sprite.is_clicked(pos)]
+        return min(hits, key=self._order.get) if hits else None
+
     def draw(self, screen: Screen, bgsurf=None, special_flags: int = 0):
         for obj in self.sprites():
             if obj.object_type == "button":
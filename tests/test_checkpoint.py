@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from engine import LifeEngine, PackedLifeEngine
+from hashlife import HashLifeEngine
+from unbounded import UnboundedLifeEngine
+from rules import RuleEngine
+from checkpoint import save_checkpoint, open_checkpoint, restore_checkpoint
+
+glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+
+def soup(shape, density=0.35, seed=0) -> np.ndarray:
+    return (np.random.default_rng(seed).random(shape) < density).astype(np.uint8)
+
+
+def test_packed_round_trip_is_memory_mapped(tmp_path):
+    # 130 columns leave a partial final word
+    engine = PackedLifeEngine((70, 130), soup((70, 130)))
+    engine.step(7)
+    save_checkpoint(tmp_path / "board.ckpt", engine, band_rows=16)
+
+    restored = restore_checkpoint(tmp_path / "board.ckpt")
+    assert isinstance(restored, PackedLifeEngine)
+    assert isinstance(restored.packed, np.memmap)
+    np.testing.assert_array_equal(restored.grid, engine.grid)
+    assert restored.stats._replace(births=0, deaths=0) == engine.stats._replace(births=0, deaths=0)
+
+    engine.step(5)
+    restored.step(5)
+    np.testing.assert_array_equal(restored.grid, engine.grid)
+    assert restored.stats == engine.stats
+
+
+def test_dense_round_trip(tmp_path):
+    engine = LifeEngine((40, 50), soup((40, 50), seed=1))
+    engine.step(3)
+    save_checkpoint(tmp_path / "board.ckpt", engine, band_rows=7)
+
+    checkpoint = open_checkpoint(tmp_path / "board.ckpt")
+    assert checkpoint.payload.dtype == np.uint64 and checkpoint.bounded
+
+    restored = restore_checkpoint(tmp_path / "board.ckpt", LifeEngine((40, 50)))
+    np.testing.assert_array_equal(restored.grid, engine.grid)
+    # births and deaths are not stored
+    assert restored.stats._replace(births=0, deaths=0) == engine.stats._replace(births=0, deaths=0)
+
+
+def test_generations_round_trip_keeps_states(tmp_path):
+    engine = RuleEngine((30, 40), soup((30, 40), density=0.3, seed=2), rule="B2/S/C3")
+    engine.step(4)
+    assert (engine.grid == 2).any()
+    save_checkpoint(tmp_path / "board.ckpt", engine)
+
+    checkpoint = open_checkpoint(tmp_path / "board.ckpt")
+    assert checkpoint.payload.dtype == np.uint8 and checkpoint.payload.shape == (30, 40)
+
+    restored = restore_checkpoint(tmp_path / "board.ckpt")
+    assert isinstance(restored, RuleEngine) and str(restored.rule) == "B2/S/C3"
+    np.testing.assert_array_equal(restored.grid, engine.grid)
+    assert (restored.iteration, restored.population) == (engine.iteration, engine.population)
+
+
+def test_mismatched_engines_are_refused(tmp_path):
+    save_checkpoint(tmp_path / "board.ckpt", LifeEngine((20, 30), soup((20, 30))))
+
+    with pytest.raises(ValueError, match="shape"):
+        restore_checkpoint(tmp_path / "board.ckpt", LifeEngine((30, 20)))
+    with pytest.raises(ValueError, match="rule"):
+        restore_checkpoint(tmp_path / "board.ckpt", RuleEngine((20, 30), rule="B36/S23"))
+
+    (tmp_path / "other.ckpt").write_bytes(b"not a checkpoint at all, just some bytes")
+    with pytest.raises(ValueError, match="not a checkpoint"):
+        open_checkpoint(tmp_path / "other.ckpt")
+
+
+@pytest.mark.parametrize("make", [HashLifeEngine, UnboundedLifeEngine])
+def test_unbounded_round_trip_keeps_cells_off_window(tmp_path, make):
+    engine = make((16, 16))
+    engine.add_pattern(glider, -40, 3)
+    engine.add_pattern(glider, 100, 200)
+    engine.step(8)
+    save_checkpoint(tmp_path / "board.ckpt", engine)
+
+    checkpoint = open_checkpoint(tmp_path / "board.ckpt")
+    assert not checkpoint.bounded and checkpoint.shape == (16, 16)
+
+    restored = restore_checkpoint(tmp_path / "board.ckpt", make((16, 16)))
+    assert (restored.iteration, restored.population) == (engine.iteration, 10)
+    assert restored.bounding_box() == engine.bounding_box()
+    np.testing.assert_array_equal(restored.window(-38, 5, 3, 3), glider)
+    np.testing.assert_array_equal(restored.window(102, 202, 3, 3), glider)
+
+    with pytest.raises(ValueError, match="unbounded"):
+        restore_checkpoint(tmp_path / "board.ckpt", LifeEngine((16, 16)))
+    assert isinstance(restore_checkpoint(tmp_path / "board.ckpt"), HashLifeEngine)
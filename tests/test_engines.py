@@ -0,0 +1,321 @@
+import io
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from engine import LifeEngine, PackedLifeEngine, BufferedLifeEngine, TiledLifeEngine, EnsembleLifeEngine
+from hashlife import HashLifeEngine
+from unbounded import UnboundedLifeEngine
+from parallel import ParallelLifeEngine
+from rules import Rule, RuleEngine
+from pattern_io import read_rle
+from cycles import Cycle, run_until_cycle
+
+glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+
+def reference_step(grid: np.ndarray) -> np.ndarray:
+    # straightforward Life on a board with dead cells beyond its edges
+    padded = np.pad(grid, 1)
+    rows, cols = grid.shape
+    neighbours = sum(padded[1 + dy: 1 + dy + rows, 1 + dx: 1 + dx + cols]
+                     for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx)
+    return ((neighbours == 3) | ((neighbours == 2) & (grid == 1))).astype(np.uint8)
+
+
+def soup(shape, density=0.35, seed=0) -> np.ndarray:
+    return (np.random.default_rng(seed).random(shape) < density).astype(np.uint8)
+
+
+def bounded_engines():
+    return [LifeEngine, PackedLifeEngine, BufferedLifeEngine, TiledLifeEngine,
+            lambda shape, grid: ParallelLifeEngine(shape, grid, workers=3),
+            lambda shape, grid: RuleEngine(shape, grid, rule="B3/S23")]
+
+
+@pytest.mark.parametrize("make", bounded_engines())
+# 130 columns leave a partial final word in the packed engine, 64 exactly fills one
+@pytest.mark.parametrize("shape", [(70, 130), (40, 64), (9, 1)])
+def test_bounded_engines_match_reference(make, shape):
+    grid = soup(shape)
+    engine = make(shape, grid)
+
+    for _ in range(25):
+        old, grid = grid, reference_step(grid)
+        engine.step()
+
+        np.testing.assert_array_equal(engine.grid, grid)
+        assert engine.population == np.count_nonzero(grid)
+        assert engine.births == np.count_nonzero(grid > old)
+        assert engine.deaths == np.count_nonzero(old > grid)
+
+        rows, cols = np.nonzero(grid)
+        expected = None if not rows.size else (cols.min(), rows.min(), np.ptp(cols) + 1, np.ptp(rows) + 1)
+        assert engine.bounding_box() == expected
+
+    if isinstance(engine, ParallelLifeEngine):
+        engine.close()
+
+
+@pytest.mark.parametrize("make", bounded_engines())
+def test_stats_follow_small_pattern(make):
+    # a glider crossing packed word boundaries and band edges, with a block left behind, on a mostly empty board
+    grid = np.zeros((90, 200), dtype=np.uint8)
+    grid[2: 5, 55: 58] = glider
+    grid[1: 3, 1: 3] = 1
+    engine = make(grid.shape, grid)
+
+    for _ in range(120):
+        old, grid = grid, reference_step(grid)
+        engine.step()
+
+        assert engine.population == np.count_nonzero(grid)
+        assert engine.births == np.count_nonzero(grid > old)
+        assert engine.deaths == np.count_nonzero(old > grid)
+
+        rows, cols = np.nonzero(grid)
+        assert engine.stats.bounding_box == (cols.min(), rows.min(), np.ptp(cols) + 1, np.ptp(rows) + 1)
+
+    np.testing.assert_array_equal(engine.grid, grid)
+    if isinstance(engine, ParallelLifeEngine):
+        engine.close()
+
+
+@pytest.mark.parametrize("make", [HashLifeEngine, UnboundedLifeEngine])
+def test_unbounded_engines_match_reference(make):
+    # a soup in the middle of a board wide enough that nothing reaches the edge in the generations run
+    grid = np.zeros((160, 160), dtype=np.uint8)
+    grid[60: 100, 60: 100] = soup((40, 40), seed=1)
+    engine = make(grid.shape, grid)
+
+    for generations in (1, 1, 2, 5, 16):
+        for _ in range(generations):
+            grid = reference_step(grid)
+        engine.step(generations)
+
+        np.testing.assert_array_equal(engine.grid, grid)
+        assert engine.population == np.count_nonzero(grid)
+
+
+def test_hashlife_matches_unbounded_off_window():
+    hashlife = HashLifeEngine((16, 16))
+    unbounded = UnboundedLifeEngine((16, 16))
+    for engine in (hashlife, unbounded):
+        engine.add_pattern(glider, 2, 2)
+        engine.add_pattern(glider[:, ::-1], 9, 4)
+
+    # the gliders leave the window, both engines keep them
+    hashlife.step(100)
+    unbounded.step(100)
+
+    window = unbounded.window(-40, -40, 200, 200)
+    np.testing.assert_array_equal(hashlife.window(-40, -40, 200, 200), window)
+    assert hashlife.population == unbounded.population == np.count_nonzero(window)
+    assert hashlife.bounding_box() == unbounded.bounding_box()
+
+
+@pytest.mark.parametrize("make", bounded_engines() + [HashLifeEngine, UnboundedLifeEngine])
+def test_grid_shape_is_checked(make):
+    engine = make((8, 8), None)
+    with pytest.raises(ValueError):
+        engine.grid = np.zeros((8, 9), dtype=np.uint8)
+
+    engine.grid = np.pad(glider, ((1, 4), (2, 3)))
+    assert engine.population == 5
+    assert engine.bounding_box() == (2, 1, 3, 3)
+
+
+def encode_rle(grid: np.ndarray, width: int = 70) -> bytes:
+    # plain run length encoder, runs are written out tag by tag and wrapped at width characters
+    tokens = []
+    for row in grid:
+        live = np.flatnonzero(row)
+        end = live[-1] + 1 if live.size else 0
+        values = row[:end]
+        if not end:
+            tokens.append("$")
+            continue
+
+        edges = np.flatnonzero(np.diff(values)) + 1
+        for start, stop in zip(np.concatenate(([0], edges)), np.concatenate((edges, [end]))):
+            count = stop - start
+            tokens.append(f"{count if count > 1 else ''}{'o' if values[start] else 'b'}")
+        tokens.append("$")
+
+    lines, line = [], ""
+    for token in tokens:
+        if len(line) + len(token) > width:
+            lines.append(line)
+            line = ""
+        line += token
+    lines.append(line + "!")
+
+    rows, cols = grid.shape
+    return f"#C random soup\nx = {cols}, y = {rows}, rule = B3/S23\n{chr(10).join(lines)}\n".encode()
+
+
+def test_read_rle():
+    assert np.array_equal(read_rle(io.BytesIO(b"x = 3, y = 3\nbo$2bo$3o!")), glider)
+
+    # blank rows are written as a single counted $
+    assert np.array_equal(read_rle(io.BytesIO(b"x = 2, y = 4\no3$bo!")), [[1, 0], [0, 0], [0, 0], [0, 1]])
+
+    for seed in range(5):
+        grid = soup((37, 211), density=0.2 * seed, seed=seed)
+        np.testing.assert_array_equal(read_rle(io.BytesIO(encode_rle(grid))), grid)
+
+
+@pytest.mark.parametrize("make", [HashLifeEngine, UnboundedLifeEngine])
+def test_no_cycle_while_pattern_leaves_window(make):
+    engine = make((20, 20), np.pad(glider, ((2, 15), (2, 15))))
+    assert run_until_cycle(engine, 300) is None
+
+    # a blinker kept inside the window is still found
+    engine = make((20, 20), None)
+    engine.add_pattern(np.ones((1, 3), dtype=np.uint8), 8, 8)
+    assert run_until_cycle(engine, 10) == Cycle(0, 2)
+
+
+@pytest.mark.parametrize("make", [BufferedLifeEngine, lambda shape, grid: ParallelLifeEngine(shape, grid, workers=2)])
+def test_step_is_allocation_free(make):
+    engine = make((500, 500), soup((500, 500)))
+    engine.step(2)
+
+    tracemalloc.start()
+    try:
+        engine.step(5)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # far below the 250 KB of a single grid, stats included
+    assert peak < 64 * 1024
+    if isinstance(engine, ParallelLifeEngine):
+        engine.close()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("B36/S23", "B36/S23"), ("23/36", "B36/S23"), ("/2/3", "B2/S/C3"), ("B2/S/C3", "B2/S/C3"),
+    ("R1,C0,M1,S3..4,B3..3,NM", "R1,C0,M1,S3..4,B3,NM"), ("R5,C0,M1,S34..58,B34..45,NM", "R5,C0,M1,S34..58,B34..45,NM"),
+    ("R2,C3,M0,S1..2,4,B3,5..6,NM", "R2,C3,M0,S1..2,4,B3,5..6,NM"),
+])
+def test_rule_str_round_trips(text, expected):
+    rule = Rule(text)
+    assert str(rule) == expected
+
+    parsed = Rule(str(rule))
+    assert (parsed.radius, parsed.states, parsed.middle) == (rule.radius, rule.states, rule.middle)
+    np.testing.assert_array_equal(parsed.table, rule.table)
+
+
+@pytest.mark.parametrize("rule", ["B0/S8", "B36/S23", "B2/S/C3", "R2,C0,M0,S0..6,B0..2,NM", "R3,C4,M1,S9..20,B8..12,NM"])
+def test_rule_engine_stats(rule):
+    engine = RuleEngine((30, 40), soup((30, 40), density=0.2, seed=2), rule=rule)
+
+    for _ in range(6):
+        old = engine.grid == 1
+        engine.step()
+        new = engine.grid == 1
+
+        assert engine.population == np.count_nonzero(new)
+        assert engine.births == np.count_nonzero(new & ~old)
+        assert engine.deaths == np.count_nonzero(old & ~new)
+
+
+@pytest.mark.parametrize("rule", ["B0/S8", "R2,C0,M0,S0..6,B0..2,NM"])
+def test_b0_rules_fill_empty_board(rule):
+    engine = RuleEngine((10, 10), rule=rule)
+    assert engine.bounding_box() is None
+    engine.step()
+
+    assert engine.population == engine.births == 100
+    assert engine.bounding_box() == (0, 0, 10, 10)
+
+
+@pytest.mark.parametrize("make", bounded_engines())
+def test_add_patterns_clips_edge_instances(make):
+    engine = make((20, 20), None)
+    engine.add_patterns([glider], [0, 0, 0, 0], [-1, 10, 18, 30], [5, -2, 18, 0])
+
+    expected = np.zeros((20, 20), dtype=np.uint8)
+    expected[5: 8, 0: 2] = glider[:, 1:]
+    expected[0: 1, 10: 13] = glider[2:]
+    expected[18: 20, 18: 20] = glider[:2, :2]
+    np.testing.assert_array_equal(engine.grid, expected)
+    assert engine.population == np.count_nonzero(expected)
+
+    # a single pattern over the edge is clipped the same way
+    engine.reset()
+    engine.add_pattern(glider, -1, 5)
+    np.testing.assert_array_equal(engine.grid[5: 8, 0: 2], glider[:, 1:])
+    assert engine.population == 4
+
+    if isinstance(engine, ParallelLifeEngine):
+        engine.close()
+
+
+@pytest.mark.parametrize("make", [HashLifeEngine, UnboundedLifeEngine])
+def test_add_patterns_off_window(make):
+    # the plane is unbounded, so instances outside the window are kept whole
+    engine = make((20, 20), None)
+    engine.add_patterns([glider], [0, 0], [-10, 5], [-7, 5])
+
+    assert engine.population == 10
+    assert engine.bounding_box() == (-10, -7, 18, 15)
+    np.testing.assert_array_equal(engine.window(-10, -7, 3, 3), glider)
+
+
+@pytest.mark.parametrize("make", [HashLifeEngine, UnboundedLifeEngine])
+def test_add_patterns_far_apart(make):
+    # a block covering these would hold 6.4 billion cells
+    xs, ys = [0, 40000, -40000, 3, 9], [0, 40000, 5, 1, 8]
+    engine = make((20, 20), None)
+
+    tracemalloc.start()
+    try:
+        engine.add_patterns([glider, np.ones((2, 2), dtype=np.uint8)], [0, 0, 0, 1, 0], xs, ys)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 1 << 20
+    assert engine.population == 4 * 5 + 4
+    assert engine.bounding_box() == (-40000, 0, 80003, 40003)
+    for x, y in zip(xs[:3], ys[:3]):
+        np.testing.assert_array_equal(engine.window(x, y, 3, 3), glider)
+
+    # the instances near the origin share a cluster
+    expected = np.zeros((16, 16), dtype=np.uint8)
+    expected[2: 5, 2: 5] = expected[10: 13, 11: 14] = glider
+    expected[3: 5, 5: 7] = 1
+    np.testing.assert_array_equal(engine.window(-2, -2, 16, 16), expected)
+
+
+def test_ensemble_matches_reference():
+    boards = np.stack([soup((30, 50), density=0.1 * (board + 1), seed=board) for board in range(4)])
+    engine = EnsembleLifeEngine(boards.shape, boards)
+
+    populations = engine.step(12)
+    assert populations.shape == (12, 4)
+
+    expected = boards.copy()
+    for generation in range(12):
+        old = expected.copy()
+        expected = np.stack([reference_step(board) for board in expected])
+        np.testing.assert_array_equal(populations[generation], np.count_nonzero(expected, axis=(1, 2)))
+
+    np.testing.assert_array_equal(engine.grid, expected)
+    np.testing.assert_array_equal(engine.births, np.count_nonzero(expected > old, axis=(1, 2)))
+    np.testing.assert_array_equal(engine.deaths, np.count_nonzero(old > expected, axis=(1, 2)))
+
+
+def test_ensemble_add_pattern_to_one_board():
+    engine = EnsembleLifeEngine((3, 10, 10))
+    engine.add_pattern(glider, 2, 2, board=1)
+    np.testing.assert_array_equal(engine.population, [0, 5, 0])
+    np.testing.assert_array_equal(engine.grid[1, 2: 5, 2: 5], glider)
+
+    engine.add_pattern(glider, 5, 5)
+    np.testing.assert_array_equal(engine.population, [5, 10, 5])
+    assert all(np.array_equal(board[5: 8, 5: 8], glider) for board in engine.grid)
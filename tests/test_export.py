@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from export import VideoExporter
+
+
+def test_gif_length_is_capped(tmp_path):
+    grid = np.zeros((8, 8), dtype=np.uint8)
+    with VideoExporter(tmp_path / "run.gif", grid.shape, block=True, gif_frames=3) as exporter:
+        for _ in range(3):
+            exporter.add(grid)
+        with pytest.raises(ValueError):
+            exporter.add(grid)
+
+    assert exporter.written == 3
+    assert (tmp_path / "run.gif").stat().st_size > 0
@@ -0,0 +1,62 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from game import GameOfLife, vec
+
+
+@pytest.fixture
+def game():
+    pg.init()
+    return GameOfLife(cells=80)
+
+
+def displayed_cells(game) -> np.ndarray:
+    # sample the centre pixel of every cell of the board on the window
+    size = int(game.cell_size.x)
+    pixels = pg.surfarray.array3d(game.window)[:int(game.display_size.x), :int(game.display_size.y)]
+    return pixels[size // 2:: size, size // 2:: size].sum(axis=2).T < 300
+
+
+def test_running_board_has_no_stale_sprites(game):
+    game.addPattern("spaceships", "glider", vec(2, 3))
+    game.addPattern("starters", "acorn", vec(40, 40))
+    game.load_update()
+    game.update_display()
+
+    game.finalise_grid()
+    game.started = True
+    for _ in range(30):
+        game.process_iteration()
+
+    # a full redraw, as after clicking a button, must show the board and not the sprites placed before the start
+    game.load_update()
+    game.update_display()
+    np.testing.assert_array_equal(displayed_cells(game), game.grid != 0)
+
+
+def test_patterns_registered_after_start_up(game):
+    from Patterns import patterns
+    from pattern_io import register_pattern
+
+    register_pattern("imported", "dot", np.ones((1, 1), dtype=np.uint8))
+    try:
+        game.addPattern("imported", "dot", vec(5, 5))
+        game.addPattern("imported", "dot", vec(7, 5))
+        assert game.display_screen.get_object("dot_1") is not None
+
+        game.update_pattern_buttons()
+        assert "imported" in [button.id for button in game.touch_screen.sprites]
+        assert [button.id for button in game.button_sets["imported"]] == ["dot", "back"]
+    finally:
+        del patterns["imported"]
+
+
+def test_record_rejects_gif(tmp_path):
+    pg.init()
+    with pytest.raises(ValueError):
+        GameOfLife(cells=20, record=str(tmp_path / "run.gif"))
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pytest
+
+from hashlife import HashLifeEngine
+from unbounded import UnboundedLifeEngine
+from pattern_io import read_cells, read_macrocell, add_macrocell
+
+glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+# glider leaf, two level 4 nodes holding it on opposite diagonals and a level 5 root sharing both of them twice
+MACROCELL = b"""[M2] (golly 4.0)
+#R B3/S23
+.*$..*$***$
+4 1 0 0 1
+4 0 1 1 0
+5 2 3 3 2
+"""
+
+
+def macrocell_grid() -> np.ndarray:
+    diagonal, anti = np.zeros((16, 16), dtype=np.uint8), np.zeros((16, 16), dtype=np.uint8)
+    diagonal[0: 3, 0: 3] = diagonal[8: 11, 8: 11] = glider
+    anti[0: 3, 8: 11] = anti[8: 11, 0: 3] = glider
+    return np.block([[diagonal, anti], [anti, diagonal]])[:27, :27]
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+def test_read_cells(newline):
+    lines = [b"!Name: glider", b"!a comment line", b".O.", b"..O", b"", b"O*O", b"!trailing comment", b"O"]
+    grid = read_cells(io.BytesIO(newline.join(lines) + newline))
+
+    expected = np.zeros((5, 3), dtype=np.uint8)
+    expected[0: 2] = glider[0: 2]
+    expected[3], expected[4, 0] = 1, 1
+    np.testing.assert_array_equal(grid, expected)
+
+
+def test_read_macrocell_shared_subtrees():
+    np.testing.assert_array_equal(read_macrocell(io.BytesIO(MACROCELL)), macrocell_grid())
+    assert read_macrocell(io.BytesIO(b"[M2] (golly 4.0)\n")).shape == (0, 0)
+
+
+@pytest.mark.parametrize("x, y", [(0, 0), (-37, 5), (1000, -3)])
+def test_add_macrocell_builds_hashlife_nodes(x, y):
+    hashlife = HashLifeEngine((40, 40))
+    unbounded = UnboundedLifeEngine((40, 40))
+    add_macrocell(hashlife, io.BytesIO(MACROCELL), x, y)
+    add_macrocell(unbounded, io.BytesIO(MACROCELL), x, y)
+
+    assert hashlife.population == unbounded.population == 8 * 5
+    assert hashlife.bounding_box() == unbounded.bounding_box() == (x, y, 27, 27)
+    np.testing.assert_array_equal(hashlife.window(x, y, 27, 27), macrocell_grid())
+
+    hashlife.step(8)
+    unbounded.step(8)
+    assert hashlife.population == unbounded.population
+    np.testing.assert_array_equal(hashlife.window(x, y, 40, 40), unbounded.window(x, y, 40, 40))
+
+
+def test_add_macrocell_stays_sparse():
+    # every level repeats the one below in all four quadrants, far too big to ever expand to a grid
+    lines = [b".*$..*$***$"] + [b"%d %d %d %d %d" % (level, level - 3, level - 3, level - 3, level - 3)
+                                for level in range(4, 21)]
+    engine = HashLifeEngine((16, 16))
+    add_macrocell(engine, io.BytesIO(b"\n".join(lines)), 3, -5)
+
+    assert engine.population == 5 * 4 ** 17
+    assert engine.bounding_box() == (3, -5, (1 << 20) - 5, (1 << 20) - 5)
+    np.testing.assert_array_equal(engine.window(3, -5, 3, 3), glider)
@@ -0,0 +1,20 @@
+import pytest
+
+from scheduler import FrameScheduler
+
+
+@pytest.mark.parametrize("speed, background", [(None, False), (None, True), (100, True)])
+def test_deadline_waits_for_the_next_frame(speed, background):
+    scheduler = FrameScheduler(speed=speed, frame_rate=50)
+    scheduler.start(0.0)
+
+    # never due immediately, so the loop sleeps instead of spinning while the worker owns the engine
+    for now in (0.0, 0.005, 0.02, 0.5):
+        deadline = scheduler.next_deadline(now, background=background)
+        assert now < deadline <= now + 1 / 50 + 1e-9
+
+
+def test_deadline_waits_for_owed_generation():
+    scheduler = FrameScheduler(speed=10, frame_rate=50)
+    scheduler.start(0.0)
+    assert scheduler.next_deadline(0.0) == pytest.approx(0.1)
@@ -0,0 +1,97 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+import pytest
+
+from screen import GameObjects, LRUCache, Screen, text_cache
+
+
+@pytest.fixture
+def screen():
+    pg.init()
+    return Screen(pg.Vector2(200, 100))
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_counters_redraw_a_reused_canvas(screen):
+    rect = pg.Rect(0, 0, 200, 30)
+    text_cache.clear()
+
+    screen.add_multiline_text("Population: 10", rect)
+    first = pg.image.tobytes(screen.surface, "RGBA")
+    canvases = dict(text_cache.canvases._entries)
+
+    screen.refresh()
+    screen.add_multiline_text("Population: 11", rect)
+    screen.refresh()
+    screen.add_multiline_text("Population: 10", rect)
+
+    # the same canvases are drawn into again, and the text comes out the same
+    assert text_cache.canvases._entries.keys() >= canvases.keys()
+    assert all(text_cache.canvases._entries[key] is surface for key, surface in canvases.items())
+    assert pg.image.tobytes(screen.surface, "RGBA") == first
+    assert not len(text_cache.layouts)
+
+
+class Box(pg.sprite.Sprite):
+    def __init__(self, rect, id=None):
+        super().__init__()
+        self.rect, self.id = pg.Rect(rect), id
+
+    def is_clicked(self, pos):
+        return self.rect.collidepoint(pos)
+
+
+def test_sprite_index_follows_moved_patterns():
+    from game import Pattern, vec
+
+    pattern = Pattern("spaceships", "glider", vec(10, 10), pos=vec(1, 1), id=7)
+    group = GameObjects([pattern], bucket_size=16)
+    assert group.sprite_at((15, 15)) is pattern
+
+    pattern.update_position(vec(30, 20), vec(80, 80))
+    assert group.sprite_at((15, 15)) is None
+    assert group.sprite_at((305, 205)) is pattern
+    assert group.get_sprite(7) is pattern
+
+
+def test_earliest_added_sprite_wins_on_overlap():
+    first, second = Box((0, 0, 40, 40), id=1), Box((20, 20, 40, 40), id=2)
+    group = GameObjects([second], bucket_size=16)
+    group.add(first)
+
+    # second was added first
+    assert group.sprite_at((30, 30)) is second
+    assert group.sprite_at((5, 5)) is first
+    assert group.sprite_at((55, 55)) is second
+
+    group.remove(second)
+    assert group.sprite_at((30, 30)) is first
+
+
+def test_remove_and_kill_keep_buckets_and_ids_in_sync():
+    boxes = [Box((10 * index, 0, 30, 30), id=index % 3) for index in range(9)]
+    group = GameObjects(boxes, bucket_size=16)
+    assert [group.get_sprite(index) for index in range(3)] == boxes[:3]
+
+    group.remove(boxes[0])
+    boxes[1].kill()
+    assert group.get_sprite(0) is boxes[3]
+    assert group.get_sprite(1) is boxes[4]
+    assert group.sprite_at((5, 5)) is None
+    assert group.sprite_at((25, 5)) is boxes[2]
+
+    group.empty()
+    assert group.get_sprite(2) is None and group.sprite_at((45, 5)) is None
+    assert not group._buckets and not group._cells and not group._by_id and not group._order
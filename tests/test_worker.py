@@ -0,0 +1,27 @@
+import time
+
+import numpy as np
+
+from engine import LifeEngine
+from history import HistoryRecorder
+from worker import SimulationWorker
+
+
+def test_worker_records_every_generation():
+    engine = LifeEngine((64, 64), (np.random.default_rng(0).random((64, 64)) < 0.3).astype(np.uint8))
+    history = HistoryRecorder()
+    history.record(engine.grid, engine.iteration, engine.population)
+
+    worker = SimulationWorker(engine, batch=4, history=history)
+    worker.start()
+    time.sleep(0.2)
+    worker.stop()
+
+    assert engine.iteration > 10
+    assert (history.first, history.last) == (0, engine.iteration)
+    assert all(iteration in history for iteration in range(engine.iteration + 1))
+
+    # stepping back one generation from the end lands on the state before the last step
+    previous = LifeEngine(engine.shape, history.seek(engine.iteration - 1).grid)
+    previous.step()
+    np.testing.assert_array_equal(previous.grid, engine.grid)
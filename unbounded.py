@@ -0,0 +1,161 @@
+import numpy as np
+
+from engine import LifeEngine, count_neighbours, pattern_clusters
+
+
+class UnboundedLifeEngine(LifeEngine):
+    bounded = False
+
+    def __init__(self, shape, grid: np.ndarray = None, chunk_size: int = 32):
+        """
+        Engine for an infinite plane. Live cells are stored in a dict of square chunks keyed by chunk coordinates,
+        and chunks are created and dropped as the population moves, so memory follows the population rather than
+        the extent of the pattern.
+
+        shape only sets the window returned by grid, with its top left corner at the origin. Cells leaving the
+        window keep evolving and still count towards population.
+
+        :param shape: (rows, cols) of the window.
+        :param grid: optional starting state, copied into the engine.
+        :param chunk_size: edge length of a chunk in cells.
+        """
+        self.chunk_size = chunk_size
+
+        super().__init__(shape, grid)
+
+    def _empty_grid(self) -> dict:
+        return {}
+
+    @property
+    def chunks(self) -> dict:
+        return self._grid
+
+    @LifeEngine.grid.getter
+    def grid(self) -> np.ndarray:
+        return self.window(0, 0, self.shape[0], self.shape[1])
+
+    def _set_grid(self, grid: np.ndarray):
+        self._grid = {}
+        self._stamp(grid, 0, 0)
+
+    def count_population(self) -> int:
+        return sum(int(np.count_nonzero(chunk)) for chunk in self._grid.values())
+
+    def window(self, x: int, y: int, rows: int, cols: int) -> np.ndarray:
+        """
+        Render the cells inside [x, x + cols) x [y, y + rows) to a dense uint8 array.
+        """
+        size = self.chunk_size
+        out = np.zeros((rows, cols), dtype=np.uint8)
+
+        for cy in range(y // size, (y + rows - 1) // size + 1):
+            for cx in range(x // size, (x + cols - 1) // size + 1):
+                chunk = self._grid.get((cx, cy))
+                if chunk is None:
+                    continue
+
+                left, top = max(cx * size, x), max(cy * size, y)
+                right, bottom = min((cx + 1) * size, x + cols), min((cy + 1) * size, y + rows)
+                out[top - y: bottom - y, left - x: right - x] = \
+                    chunk[top - cy * size: bottom - cy * size, left - cx * size: right - cx * size]
+
+        return out
+
+    def bounding_box(self):
+        """
+        Return (x, y, width, height) of the live cells, or None if the plane is empty.
+        """
+        if not self._grid:
+            return None
+
+        size = self.chunk_size
+        left = top = right = bottom = None
+        for (cx, cy), chunk in self._grid.items():
+            live_rows, live_cols = np.nonzero(chunk.any(axis=1))[0], np.nonzero(chunk.any(axis=0))[0]
+            x0, x1 = cx * size + live_cols[0], cx * size + live_cols[-1]
+            y0, y1 = cy * size + live_rows[0], cy * size + live_rows[-1]
+
+            left = x0 if left is None else min(left, x0)
+            top = y0 if top is None else min(top, y0)
+            right = x1 if right is None else max(right, x1)
+            bottom = y1 if bottom is None else max(bottom, y1)
+
+        return int(left), int(top), int(right - left + 1), int(bottom - top + 1)
+
+    def add_pattern(self, pattern: np.ndarray, x: int, y: int):
+        self._stamp(pattern, x, y)
+        self._refresh()
+
+    def add_patterns(self, patterns, ids, xs, ys):
+        # instances are grouped by squares of 8 x 8 chunks and every group is stamped straight into the chunks it
+        # covers, recounting once at the end
+        for block, x, y in pattern_clusters(patterns, ids, xs, ys, tile=8 * self.chunk_size):
+            self._stamp(block, x, y)
+        self._refresh()
+
+    def _stamp(self, pattern: np.ndarray, x: int, y: int):
+        # OR the pattern into the chunks it overlaps, creating them as needed
+        x, y, size = int(x), int(y), self.chunk_size
+        pattern = np.asarray(pattern) != 0
+        rows, cols = pattern.shape
+
+        for cy in range(y // size, (y + rows - 1) // size + 1):
+            for cx in range(x // size, (x + cols - 1) // size + 1):
+                left, top = max(cx * size, x), max(cy * size, y)
+                right, bottom = min((cx + 1) * size, x + cols), min((cy + 1) * size, y + rows)
+                section = pattern[top - y: bottom - y, left - x: right - x]
+                if not section.any():
+                    continue
+
+                chunk = self._grid.setdefault((cx, cy), np.zeros((size, size), dtype=np.uint8))
+                chunk[top - cy * size: bottom - cy * size, left - cx * size: right - cx * size] |= section
+
+    def _find_bounds(self):
+        # computed on demand from the chunks instead
+        return None
+
+    def _halo(self, cx: int, cy: int) -> np.ndarray:
+        # the chunk with a one cell border taken from its eight neighbours
+        size = self.chunk_size
+        halo = np.zeros((size + 2, size + 2), dtype=np.uint8)
+        inner = slice(1, size + 1)
+
+        for dy, rows, src_rows in ((-1, slice(0, 1), slice(size - 1, size)), (0, inner, slice(0, size)),
+                                   (1, slice(size + 1, size + 2), slice(0, 1))):
+            for dx, cols, src_cols in ((-1, slice(0, 1), slice(size - 1, size)), (0, inner, slice(0, size)),
+                                       (1, slice(size + 1, size + 2), slice(0, 1))):
+                chunk = self._grid.get((cx + dx, cy + dy))
+                if chunk is not None:
+                    halo[rows, cols] = chunk[src_rows, src_cols]
+
+        return halo
+
+    def _step(self):
+        size = self.chunk_size
+
+        candidates = set()
+        for cx, cy in self._grid:
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    candidates.add((cx + dx, cy + dy))
+
+        new_chunks = {}
+        self.births = self.deaths = 0
+        for cx, cy in candidates:
+            halo = self._halo(cx, cy)
+            if not halo.any():
+                continue
+
+            neighbours = count_neighbours(halo)[1: size + 1, 1: size + 1]
+            old_chunk = halo[1: size + 1, 1: size + 1]
+            new_chunk = ((neighbours | old_chunk) == 3).astype(np.uint8)
+
+            self.births += int(np.count_nonzero(new_chunk > old_chunk))
+            self.deaths += int(np.count_nonzero(old_chunk > new_chunk))
+
+            # chunks that empty out are dropped so storage shrinks with the population
+            if new_chunk.any():
+                new_chunks[(cx, cy)] = new_chunk
+
+        self._grid = new_chunks
+        self.population += self.births - self.deaths
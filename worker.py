@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+Frame = namedtuple("Frame", ["grid", "iteration", "population"])
+
+
+class SimulationWorker:
+    def __init__(self, engine, ring_size: int = 3, speed: float = None, batch: int = 1, history=None):
+        """
+        Steps an engine on a background thread and publishes finished generations through a ring of preallocated
+        grids. The UI thread picks up the latest frame with latest() without taking a lock, so a slow generation
+        never blocks input handling or rendering. The engine must not be touched by other threads while the
+        worker is running.
+
+        :param engine: engine to step, anything with the LifeEngine interface.
+        :param ring_size: number of frame buffers, at least 3 so the writer always has a free slot.
+        :param speed: target generations per second, or None to run flat out.
+        :param batch: generations stepped between published frames.
+        :param history: optional HistoryRecorder that every generation is recorded into, from the worker thread, so
+            only read it while the worker is stopped.
+        """
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3")
+
+        self.engine = engine
+        self.speed = speed
+        self.batch = batch
+        self.history = history
+
+        shape = np.shape(engine.grid)
+        self._buffers = [np.zeros(shape, dtype=np.uint8) for _ in range(ring_size)]
+        # iteration held in each slot, -1 while the slot is being written
+        self._stamps = [-1] * ring_size
+        self._populations = [0] * ring_size
+
+        self._latest = None
+        self._reading = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+
+        self._latest = None
+        self._reading = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the worker and wait for the generation in progress to finish, handing the engine back to the caller.
+        """
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def latest(self):
+        """
+        Return the most recently published Frame, or None if nothing has been published since start. The grid
+        stays valid until the next call to latest().
+        """
+        while True:
+            slot = self._latest
+            if slot is None:
+                return None
+
+            # claim the slot before checking it, the writer checks the claim after marking a slot as in use
+            self._reading = slot
+            iteration = self._stamps[slot]
+            if iteration >= 0:
+                return Frame(self._buffers[slot], iteration, self._populations[slot])
+
+    def _free_slot(self) -> int:
+        # the reader can only move its claim onto the latest slot, so a free slot turns up within two passes
+        while True:
+            for slot in range(len(self._buffers)):
+                if slot == self._latest or slot == self._reading:
+                    continue
+
+                self._stamps[slot] = -1
+                if self._reading != slot:
+                    return slot
+
+    def _publish(self):
+        slot = self._free_slot()
+
+        np.copyto(self._buffers[slot], self.engine.grid)
+        self._populations[slot] = self.engine.population
+        self._stamps[slot] = self.engine.iteration
+
+        self._latest = slot
+
+    def _run(self):
+        owed, last = 0.0, time.monotonic()
+        while not self._stop.is_set():
+            if self.speed is None:
+                generations = self.batch
+            else:
+                now = time.monotonic()
+                owed = min(owed + (now - last) * self.speed, float(self.batch))
+                last = now
+
+                generations = int(owed)
+                if not generations:
+                    self._stop.wait((1 - owed) / self.speed)
+                    continue
+                owed -= generations
+
+            if self.history is None:
+                self.engine.step(generations)
+            else:
+                # one generation at a time so the history holds consecutive generations
+                for _ in range(generations):
+                    self.engine.step()
+                    self.history.record(self.engine.grid, self.engine.iteration, self.engine.population)
+            self._publish()